@@ -10,6 +10,7 @@ def main():
     BASE_URL = 'https://jmap.example.com'
     USERNAME = 'user@example.com'
     PASSWORD = 'your-password'
+    UNREAD_ONLY = False  # Only list unread emails (filtered on the server)
     
     # Create and connect client
     with JMAPClient(BASE_URL, USERNAME, PASSWORD) as client:
@@ -27,29 +28,40 @@ def main():
             print(f"  [{role:10}] {name:20} - {total} total, {unread} unread")
         
         # Find inbox
-        inbox = next((mb for mb in mailboxes if mb.get('role') == 'inbox'), None)
+        inbox = mailboxes.by_role.get('inbox')
         
         if inbox:
             print(f"\n✓ Found inbox: {inbox['name']} (ID: {inbox['id']})")
             
-            # Query recent emails
-            print("\nQuerying recent emails...")
-            email_ids = client.query_emails(
-                filter={'inMailbox': inbox['id']},
-                sort=[{'property': 'receivedAt', 'isAscending': False}],
-                limit=5
-            )
+            # Query recent emails and fetch their details in one request:
+            # Email/get takes its ids from the Email/query result
+            print("\nFetching recent emails...")
+            account_id = client.session.get_account_id()
+            email_filter = {'inMailbox': inbox['id']}
+            if UNREAD_ONLY:
+                # Let the server drop read emails instead of filtering in Python
+                email_filter['notKeyword'] = '$seen'
+            
+            results = client.call_batch([
+                ['Email/query', {
+                    'accountId': account_id,
+                    'filter': email_filter,
+                    'sort': [{'property': 'receivedAt', 'isAscending': False}],
+                    'limit': 5
+                }, 'query'],
+                ['Email/get', {
+                    'accountId': account_id,
+                    '#ids': client.result_reference('query', 'Email/query', '/ids'),
+                    'properties': ['id', 'subject', 'from', 'receivedAt', 'preview', 'keywords']
+                }, 'emails']
+            ])
+            email_ids = results['query'].get('ids', [])
+            emails = results['emails'].get('list', [])
             
             print(f"✓ Found {len(email_ids)} emails")
             
-            # Fetch email details
-            if email_ids:
-                print("\nFetching email details...")
-                emails = client.get_emails(
-                    ids=email_ids,
-                    properties=['id', 'subject', 'from', 'receivedAt', 'preview', 'keywords']
-                )
-                
+            # Show email details
+            if emails:
                 for i, email_data in enumerate(emails, 1):
                     email = Email.from_dict(email_data)
                     
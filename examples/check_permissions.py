@@ -16,6 +16,8 @@ def main():
     print("\n🔐 Checking API Key Permissions...\n")
     
     with JMAPClient(BASE_URL, USERNAME, API_KEY) as client:
+        print(f"🔌 Connected over {client.session.http_version or 'unknown protocol'}\n")
+        
         # Method 1: Print formatted permissions
         client.print_permissions()
         
@@ -11,7 +11,7 @@ def main():
     # Fastmail API Key configuration
     BASE_URL = 'https://api.fastmail.com'
     
-    # API key (starts with 'fmu') - generate at:
+    # API key (starts with 'fmu1-') - generate at:
     # https://app.fastmail.com/settings/security/tokens
     API_KEY = 'fmu1-your-api-key-here'
     
@@ -22,7 +22,7 @@ def main():
     print("Note: API keys use Bearer token authentication\n")
     
     try:
-        # The library auto-detects Bearer token if password starts with 'fmu'
+        # The library auto-detects Bearer token if password starts with 'fmu1-'
         with JMAPClient(BASE_URL, USERNAME, API_KEY) as client:
             print("✓ Connected successfully with API key!")
             
@@ -52,23 +52,19 @@ def main():
                 print(f"   {icon} {name:20} - {total} total, {unread} unread")
             
             # Find inbox
-            inbox = next((mb for mb in mailboxes if mb.get('role') == 'inbox'), None)
+            inbox = mailboxes.by_role.get('inbox')
             
             if inbox:
                 # Query recent emails
                 print(f"\n📧 Recent emails from Inbox:")
-                email_ids = client.query_emails(
+                emails = client.query_and_get_emails(
                     filter={'inMailbox': inbox['id']},
                     sort=[{'property': 'receivedAt', 'isAscending': False}],
-                    limit=5
+                    limit=5,
+                    properties=['id', 'subject', 'from', 'receivedAt', 'preview', 'keywords']
                 )
                 
-                if email_ids:
-                    emails = client.get_emails(
-                        ids=email_ids,
-                        properties=['id', 'subject', 'from', 'receivedAt', 'preview', 'keywords']
-                    )
-                    
+                if emails:
                     for i, email_data in enumerate(emails, 1):
                         email = Email.from_dict(email_data)
                         
@@ -50,23 +50,27 @@ def main():
                 print(f"   {icon} {name:20} - {total} total, {unread} unread")
             
             # Find inbox
-            inbox = next((mb for mb in mailboxes if mb.get('role') == 'inbox'), None)
+            inbox = mailboxes.by_role.get('inbox')
             
             if inbox:
-                # Query recent emails
+                # Query recent emails and fetch them in the same request
                 print(f"\n📧 Recent emails from Inbox:")
-                email_ids = client.query_emails(
-                    filter={'inMailbox': inbox['id']},
-                    sort=[{'property': 'receivedAt', 'isAscending': False}],
-                    limit=5
-                )
+                results = client.call_batch([
+                    ['Email/query', {
+                        'accountId': account_id,
+                        'filter': {'inMailbox': inbox['id']},
+                        'sort': [{'property': 'receivedAt', 'isAscending': False}],
+                        'limit': 5
+                    }, 'query'],
+                    ['Email/get', {
+                        'accountId': account_id,
+                        '#ids': client.result_reference('query', 'Email/query', '/ids'),
+                        'properties': ['id', 'subject', 'from', 'receivedAt', 'preview', 'keywords']
+                    }, 'emails']
+                ])
+                emails = results['emails'].get('list', [])
                 
-                if email_ids:
-                    emails = client.get_emails(
-                        ids=email_ids,
-                        properties=['id', 'subject', 'from', 'receivedAt', 'preview', 'keywords']
-                    )
-                    
+                if emails:
                     for i, email_data in enumerate(emails, 1):
                         email = Email.from_dict(email_data)
                         
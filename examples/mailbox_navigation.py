@@ -4,7 +4,42 @@ JMAP Engine - Mailbox Navigation Example
 Demonstrates mailbox tree navigation, counting emails, and exploring hierarchy.
 """
 
-from jmap_engine import JMAPClient
+try:
+    import readline
+except ImportError:  # Not available on Windows
+    readline = None
+
+from jmap_engine import JMAPClient, StateCache
+
+
+def fetch_recent_unread(client, mailboxes, limit=10):
+    """
+    Query recent unread emails for every mailbox.
+    
+    The queries are batched, up to the server's maxCallsInRequest per
+    request, so this costs one round trip for most accounts instead of
+    one per mailbox.
+    """
+    core = client.session.capabilities.get('urn:ietf:params:jmap:core', {})
+    batch_size = core.get('maxCallsInRequest') or 16  # RFC 8620's suggested minimum
+    account_id = client.session.get_account_id()
+    
+    recent_unread = {}
+    for start in range(0, len(mailboxes), batch_size):
+        batch = mailboxes[start:start + batch_size]
+        results = client.call_batch([
+            ['Email/query', {
+                'accountId': account_id,
+                'filter': {'inMailbox': mailbox.id, 'notKeyword': '$seen'},
+                'sort': [{'property': 'receivedAt', 'isAscending': False}],
+                'limit': limit
+            }, f'q{i}']
+            for i, mailbox in enumerate(batch)
+        ])
+        for i, mailbox in enumerate(batch):
+            recent_unread[mailbox.id] = results.get(f'q{i}', {}).get('ids', [])
+    
+    return recent_unread
 
 
 def main():
@@ -17,7 +52,8 @@ def main():
     print("         JMAP Engine - Mailbox Navigation Example")
     print("=" * 70)
     
-    with JMAPClient(BASE_URL, USERNAME, API_KEY) as client:
+    # The cache keeps the session and mailbox list between runs
+    with JMAPClient(BASE_URL, USERNAME, API_KEY, cache=StateCache.on_disk()) as client:
         print("\n✓ Connected to JMAP server\n")
         
         # Get mailbox tree
@@ -115,10 +151,31 @@ def main():
                 unread_recursive = root.get_unread_emails_recursive()
                 print(f"      └─ {len(all_children)} total subfolders, {total_recursive} emails")
         
-        # 8. Interactive navigation
+        # 8. Recent unread emails, queried for all mailboxes in one request
+        print(f"\n⚡ Recent Unread (one batched request):")
+        print("-" * 70)
+        
+        recent_unread = fetch_recent_unread(client, tree.get_all_mailboxes())
+        for root in tree.roots:
+            # Aggregate the per-mailbox results over each root's subtree
+            subtree = root.get_all_children(include_self=True)
+            count = sum(len(recent_unread.get(mailbox.id, [])) for mailbox in subtree)
+            print(f"   {root.name}: {count} recent unread across {len(subtree)} mailbox(es)")
+        
+        # 9. Interactive navigation
         print(f"\n🧭 Interactive Mailbox Explorer:")
         print("-" * 70)
         
+        if readline is not None:
+            # Tab-complete mailbox names from the tree's prefix index
+            def complete(text, state):
+                names = sorted({m.name for m in tree.find_by_prefix(text)})
+                return names[state] if state < len(names) else None
+            
+            readline.set_completer(complete)
+            readline.set_completer_delims('/')
+            readline.parse_and_bind('tab: complete')
+        
         while True:
             choice = input("\nEnter mailbox name to explore (or 'quit' to exit): ").strip()
             
@@ -128,12 +185,17 @@ def main():
             if not choice:
                 continue
             
-            # Try to find mailbox
-            mailbox = tree.get_by_name(choice)
+            # Try to find mailbox by exact name, then by path
+            mailbox = tree.get_by_name(choice) or tree.find_by_path(choice)
             
             if not mailbox:
-                # Try by path
-                mailbox = tree.find_by_path(choice)
+                # Fall back to a name prefix if it is unambiguous
+                matches = tree.find_by_prefix(choice)
+                if len(matches) == 1:
+                    mailbox = matches[0]
+                elif matches:
+                    print(f"   ? '{choice}' matches: {', '.join(m.name for m in matches[:10])}")
+                    continue
             
             if mailbox:
                 print(f"\n📂 {mailbox.name}")
@@ -4,7 +4,7 @@ Simple Mailbox Browser Example
 Quick demo of mailbox navigation features.
 """
 
-from jmap_engine import JMAPClient
+from jmap_engine import JMAPClient, StateCache
 
 
 # Configuration
@@ -12,9 +12,10 @@ BASE_URL = 'https://api.fastmail.com'
 API_KEY = 'your-api-key-here'
 USERNAME = 'your-email@fastmail.com'
 
-with JMAPClient(BASE_URL, USERNAME, API_KEY) as client:
-    # Get mailbox tree
-    tree = client.get_mailbox_tree()
+# The cache keeps the session and mailbox list between runs
+with JMAPClient(BASE_URL, USERNAME, API_KEY, cache=StateCache.on_disk()) as client:
+    # Get mailbox tree, prefetching the newest inbox/sent/drafts envelopes
+    tree = client.get_mailbox_tree(prefetch=True)
     
     # 1. Print tree structure
     print("📁 Your Mailboxes:\n")
@@ -26,6 +27,12 @@ with JMAPClient(BASE_URL, USERNAME, API_KEY) as client:
     print(f"   Total emails: {inbox.total_emails}")
     print(f"   Unread: {inbox.unread_emails}")
     
+    # Newest emails were loaded with the tree - no extra round trip
+    if inbox.cached_envelopes:
+        print(f"   Latest:")
+        for envelope in inbox.cached_envelopes[:5]:
+            print(f"      • {envelope.get('subject') or '(no subject)'}")
+    
     # 3. Check if inbox has subfolders
     if inbox.has_children:
         print(f"   Subfolders:")
@@ -7,8 +7,10 @@ __author__ = "cocdeshijie"
 __license__ = "MIT"
 
 from .client import JMAPClient
-from .email import Email, EmailQuery, EmailSubmission, EmailAddress, EmailBodyPart
-from .mailbox import Mailbox, MailboxTree
+from .async_client import AsyncJMAPClient
+from .email import Email, EmailQuery, EmailSubmission, EmailAddress, EmailBodyPart, to_jmap_filter
+from .mailbox import Mailbox, MailboxList, MailboxTree
+from .cache import StateCache
 from .exceptions import (
     JMAPError,
     JMAPAuthError,
@@ -18,13 +20,17 @@ from .exceptions import (
 
 __all__ = [
     "JMAPClient",
+    "AsyncJMAPClient",
     "Email",
     "EmailQuery",
     "EmailSubmission",
     "EmailAddress",
     "EmailBodyPart",
+    "to_jmap_filter",
     "Mailbox",
+    "MailboxList",
     "MailboxTree",
+    "StateCache",
     "JMAPError",
     "JMAPAuthError",
     "JMAPNetworkError",
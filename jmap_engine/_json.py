@@ -0,0 +1,62 @@
+"""
+JSON encoding/decoding backend
+
+Uses orjson when it is installed, then msgspec, and falls back to the
+standard library json module otherwise. All paths work on bytes so request
+bodies can be posted and responses parsed without an intermediate str copy.
+"""
+
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - exercised only without msgspec
+    msgspec = None
+
+import json
+
+
+if orjson is not None:
+    JSONDecodeError = orjson.JSONDecodeError
+    
+    def dumps(obj: Any) -> bytes:
+        """Serialize obj to JSON bytes"""
+        return orjson.dumps(obj)
+    
+    def loads(data: bytes) -> Any:
+        """Deserialize JSON bytes (or str) to Python objects"""
+        return orjson.loads(data)
+    
+    BACKEND = 'orjson'
+elif msgspec is not None:
+    JSONDecodeError = msgspec.DecodeError
+    
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+    
+    def dumps(obj: Any) -> bytes:
+        """Serialize obj to JSON bytes"""
+        return _encoder.encode(obj)
+    
+    def loads(data: bytes) -> Any:
+        """Deserialize JSON bytes (or str) to Python objects"""
+        return _decoder.decode(data)
+    
+    BACKEND = 'msgspec'
+else:
+    JSONDecodeError = json.JSONDecodeError
+    
+    def dumps(obj: Any) -> bytes:
+        """Serialize obj to JSON bytes"""
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    
+    def loads(data: bytes) -> Any:
+        """Deserialize JSON bytes (or str) to Python objects"""
+        return json.loads(data)
+    
+    BACKEND = 'json'
@@ -0,0 +1,421 @@
+"""
+Async JMAP Client - asyncio variant of JMAPClient
+
+Requires the optional httpx dependency (pip install "jmap-engine[http2]").
+"""
+
+import asyncio
+import itertools
+from typing import Dict, List, Any, Optional, Sequence, Union
+from . import _json
+from .client import JMAPClient, _email_get_args, _email_query_args, _encode_request
+from .session import JMAPSession, HTTPX_ACCEPT_ENCODING, TRANSPORT_ERRORS, httpx
+from .mailbox import MailboxList, MailboxTree
+from .email import EmailQuery
+from .exceptions import JMAPAuthError, JMAPNetworkError
+
+
+class AsyncJMAPSession(JMAPSession):
+    """
+    JMAP session backed by httpx.AsyncClient.
+    
+    Shares authentication and session parsing with JMAPSession; the HTTP
+    methods are coroutines.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        username: str,
+        password: str,
+        timeout: int = 30,
+        use_bearer_token: bool = False,
+        http2: bool = True,
+        pool_size: int = 10,
+        retries: int = 3,
+        compress_requests: bool = False
+    ):
+        if httpx is None:
+            raise ImportError(
+                "AsyncJMAPClient requires httpx: pip install \"jmap-engine[http2]\""
+            )
+        
+        self.pool_size = pool_size
+        super().__init__(
+            base_url, username, password, timeout, use_bearer_token, http2,
+            retries=retries, compress_requests=compress_requests
+        )
+    
+    def _create_http_session(self):
+        """Create the underlying async HTTP client"""
+        # Without HTTP/2, pool_size connections carry the concurrent requests
+        return httpx.AsyncClient(
+            http2=self.http2,
+            headers={**self._base_headers, 'Accept-Encoding': HTTPX_ACCEPT_ENCODING},
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            )
+        )
+    
+    async def discover_session(self) -> None:
+        """
+        Discover JMAP session endpoint and capabilities.
+        
+        Fetches the session object from /.well-known/jmap
+        as specified in RFC 8620 Section 2.2.
+        """
+        try:
+            response = await self.session.get(self.well_known_url)
+            response.raise_for_status()
+        except TRANSPORT_ERRORS as e:
+            raise JMAPNetworkError(f"Failed to discover JMAP session: {e}")
+        
+        self._record_http_version(response)
+        
+        try:
+            session_data = _json.loads(response.content)
+        except ValueError as e:
+            raise JMAPAuthError(f"Invalid JSON response: {e}")
+        
+        self._load_session_data(session_data)
+    
+    # Statuses that mean the request was not processed and may be resent
+    _RETRY_STATUSES = (429, 503)
+    _BACKOFF_FACTOR = 0.3
+    
+    async def post(self, url: str, body: bytes, headers: Optional[Dict[str, str]] = None):
+        """
+        POST a pre-encoded request body.
+        
+        Rate-limited (429) and unavailable (503) responses are retried up to
+        `retries` times, waiting for the server's Retry-After or an
+        exponential backoff.
+        
+        Raises the transport's own exceptions (see TRANSPORT_ERRORS).
+        """
+        body, headers = self._compress_body(body, headers)
+        attempt = 0
+        while True:
+            response = await self.session.post(url, content=body, headers=headers)
+            if response.status_code not in self._RETRY_STATUSES or attempt >= self.retries:
+                break
+            
+            await asyncio.sleep(self._retry_delay(response, attempt))
+            attempt += 1
+        
+        response.raise_for_status()
+        self._record_http_version(response)
+        return response
+    
+    def _retry_delay(self, response, attempt: int) -> float:
+        """Seconds to wait before retrying a rejected request"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass  # HTTP-date form; fall back to backoff
+        return self._BACKOFF_FACTOR * (2 ** attempt)
+    
+    async def close(self):
+        """Close the HTTP session"""
+        await self.session.aclose()
+
+
+class AsyncJMAPClient:
+    """
+    Asyncio JMAP client.
+    
+    Mirrors the read API of JMAPClient with coroutines, so independent
+    calls can run concurrently over one HTTP/2 connection (or a pool of
+    HTTP/1.1 connections).
+    
+    Example:
+        >>> async with AsyncJMAPClient('https://api.fastmail.com', 'user', 'fmu1-...') as client:
+        ...     tree = await client.get_mailbox_tree()
+        ...     results = await asyncio.gather(*[
+        ...         client.query_emails(filter={'inMailbox': mb.id}, limit=10)
+        ...         for mb in tree.get_all_mailboxes()
+        ...     ])
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        username: str,
+        password: str,
+        timeout: int = 30,
+        use_bearer_token: bool = False,
+        http2: bool = True,
+        pool_size: int = 10,
+        max_concurrency: int = 64,
+        retries: int = 3,
+        compress_requests: bool = False
+    ):
+        """
+        Initialize async JMAP client.
+        
+        Args:
+            base_url: Base URL of the JMAP server (e.g., 'https://jmap.example.com')
+            username: Username or email address (not used with Bearer token)
+            password: Password, app password, or API token (e.g., Fastmail API key)
+            timeout: HTTP request timeout in seconds
+            use_bearer_token: Use Bearer token auth (auto-detected for Fastmail API keys)
+            http2: Use HTTP/2 when the optional h2 package is installed
+            pool_size: Maximum number of connections (matters for HTTP/1.1 servers)
+            max_concurrency: Maximum number of requests in flight at once
+            retries: Retries for rate-limited (429) or unavailable (503) responses
+            compress_requests: zstd-compress request bodies over 16 KiB (the
+                server must accept Content-Encoding: zstd; raises ImportError
+                without zstandard)
+        """
+        self.session = AsyncJMAPSession(
+            base_url, username, password, timeout, use_bearer_token, http2, pool_size, retries,
+            compress_requests
+        )
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._request_ids = itertools.count(1)
+    
+    result_reference = staticmethod(JMAPClient.result_reference)
+    
+    async def connect(self) -> None:
+        """
+        Connect to JMAP server and discover capabilities.
+        
+        This must be called before making any API requests.
+        """
+        await self.session.discover_session()
+    
+    async def close(self) -> None:
+        """Close the JMAP client session"""
+        await self.session.close()
+    
+    async def __aenter__(self):
+        """Async context manager entry"""
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.close()
+    
+    def _account_id(self, account_id: Optional[str]) -> str:
+        """Resolve account_id, defaulting to the primary mail account"""
+        if account_id is None:
+            return self.session.get_account_id()
+        return account_id
+    
+    def _next_request_id(self) -> str:
+        """Generate next request ID"""
+        # next() on itertools.count is a single C call, so concurrent callers
+        # (threads sharing a client) can never get the same ID
+        return f"req{next(self._request_ids)}"
+    
+    async def make_request(
+        self,
+        method_calls: List[List[Any]],
+        using: Optional[Sequence[str]] = None
+    ) -> Dict:
+        """
+        Make a JMAP API request.
+        
+        Args:
+            method_calls: List of method calls [methodName, arguments, callId]
+            using: List of capability URIs to declare
+        
+        Returns:
+            Dict containing server response
+        
+        Raises:
+            JMAPNetworkError: On network errors
+            JMAPServerError: On server errors
+        """
+        response_data, _ = JMAPClient._parse_response(await self._send(method_calls, using))
+        return response_data
+    
+    async def _send(self, method_calls: List[List[Any]], using: Optional[Sequence[str]] = None) -> bytes:
+        """POST a JMAP request and return the raw response body"""
+        body = _encode_request(method_calls, using)
+        
+        # Created lazily so it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        try:
+            async with self._semaphore:
+                response = await self.session.post(
+                    self.session.api_url,
+                    body,
+                    headers={'Content-Type': 'application/json'}
+                )
+        except TRANSPORT_ERRORS as e:
+            raise JMAPNetworkError(f"Request failed: {e}")
+        
+        return response.content
+    
+    async def call_batch(
+        self,
+        method_calls: List[List[Any]],
+        using: Optional[Sequence[str]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Send several method calls in a single JMAP request.
+        
+        See JMAPClient.call_batch.
+        
+        Returns:
+            Dict mapping each callId to the arguments of its response
+        """
+        calls = []
+        for call in method_calls:
+            if len(call) == 2:
+                call = [call[0], call[1], self._next_request_id()]
+            calls.append(list(call))
+        
+        content = await self._send(JMAPClient._order_calls(calls), using)
+        _, results = JMAPClient._parse_response(content)
+        return results
+    
+    async def _call(
+        self,
+        method: str,
+        arguments: Dict[str, Any],
+        using: Optional[Sequence[str]] = None
+    ) -> Dict:
+        """Make a single method call and return its response arguments"""
+        call_id = self._next_request_id()
+        results = await self.call_batch([[method, arguments, call_id]], using=using)
+        return results.get(call_id, {})
+    
+    async def get_mailboxes(self, account_id: Optional[str] = None) -> MailboxList:
+        """
+        Get all mailboxes.
+        
+        Args:
+            account_id: Account ID (uses primary if not specified)
+        
+        Returns:
+            List of mailbox objects, with a by_role index
+        """
+        account_id = self._account_id(account_id)
+        
+        result = await self._call('Mailbox/get', {
+            'accountId': account_id,
+            'ids': None  # Get all mailboxes
+        })
+        
+        return MailboxList(result.get('list', []))
+    
+    async def get_mailbox_tree(self, account_id: Optional[str] = None) -> MailboxTree:
+        """
+        Get mailbox tree structure for easy navigation.
+        
+        Args:
+            account_id: Account ID (uses primary if not specified)
+        
+        Returns:
+            MailboxTree object with hierarchical mailbox structure
+        """
+        account_id = self._account_id(account_id)
+        
+        result = await self._call('Mailbox/get', {
+            'accountId': account_id,
+            'ids': None  # Get all mailboxes
+        })
+        
+        return MailboxTree(result.get('list', []), state=result.get('state'))
+    
+    async def query_emails(
+        self,
+        filter: Union[Dict, EmailQuery, List, None] = None,
+        sort: Optional[List[Dict]] = None,
+        limit: Optional[int] = None,
+        account_id: Optional[str] = None
+    ) -> List[str]:
+        """
+        Query email IDs matching criteria.
+        
+        Filtering runs on the server, so prefer a precise filter over
+        fetching emails and filtering them in Python.
+        
+        Args:
+            filter: Filter criteria (e.g., {'inMailbox': 'mailbox-id', 'notKeyword': '$seen'}),
+                an EmailQuery, an operator dict ({'operator': 'OR', 'conditions': [...]})
+                or a list of conditions to AND; datetime values are converted to UTCDates
+            sort: Sort criteria (e.g., [{'property': 'receivedAt', 'isAscending': False}])
+            limit: Maximum number of results
+            account_id: Account ID (uses primary if not specified)
+        
+        Returns:
+            List of email IDs
+        """
+        account_id = self._account_id(account_id)
+        
+        query_args = _email_query_args(account_id, filter, sort, limit)
+        result = await self._call('Email/query', query_args)
+        return result.get('ids', [])
+    
+    async def get_emails(
+        self,
+        ids: List[str],
+        properties: Optional[List[str]] = None,
+        account_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Get email objects by IDs.
+        
+        Args:
+            ids: List of email IDs
+            properties: Properties to fetch (fetches all if None)
+            account_id: Account ID (uses primary if not specified)
+        
+        Returns:
+            List of email objects
+        """
+        account_id = self._account_id(account_id)
+        
+        get_args = _email_get_args(account_id, ids, properties)
+        result = await self._call('Email/get', get_args)
+        return result.get('list', [])
+    
+    async def get_emails_bulk(
+        self,
+        ids: List[str],
+        properties: Optional[List[str]] = None,
+        account_id: Optional[str] = None,
+        chunk: int = 500
+    ) -> List[Dict]:
+        """
+        Get many emails with concurrent Email/get requests.
+        
+        IDs are split into chunks (no larger than the server's
+        maxObjectsInGet) that are fetched concurrently, up to
+        max_concurrency requests at a time.
+        
+        Args:
+            ids: List of email IDs
+            properties: Properties to fetch (fetches all if None)
+            account_id: Account ID (uses primary if not specified)
+            chunk: Maximum number of IDs per Email/get call
+        
+        Returns:
+            List of email objects, in the order of ids (IDs the server
+            reports as notFound are left out)
+        """
+        core = self.session.capabilities.get('urn:ietf:params:jmap:core', {})
+        max_objects = core.get('maxObjectsInGet')
+        if max_objects:
+            chunk = min(chunk, max_objects)
+        
+        batches = await asyncio.gather(*[
+            self.get_emails(ids[start:start + chunk], properties, account_id)
+            for start in range(0, len(ids), chunk)
+        ])
+        
+        # Servers may return /get results in any order (RFC 8620 Section 5.1)
+        by_id = {email['id']: email for batch in batches for email in batch}
+        return [by_id[email_id] for email_id in ids if email_id in by_id]
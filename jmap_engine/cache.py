@@ -0,0 +1,127 @@
+"""
+JMAP state cache
+
+Stores JMAP data (session objects, Mailbox/get results) together with the
+state string the server returned for it. The state acts as an ETag: as long
+as the server reports the same state, the cached data is still valid.
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, Optional, Tuple
+from . import _json
+
+try:
+    import platformdirs
+except ImportError:
+    platformdirs = None
+
+
+def default_cache_dir() -> str:
+    """Get the per-user cache directory for jmap_engine"""
+    if platformdirs is not None:
+        return platformdirs.user_cache_dir('jmap_engine')
+    
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'jmap_engine')
+
+
+class StateCache:
+    """
+    Cache of JMAP data keyed by (scope, name) and tagged with a state string.
+    
+    Entries are kept in memory and, when a directory is given, also written
+    to disk so they survive between runs.
+    
+    Example:
+        >>> cache = StateCache.on_disk()
+        >>> client = JMAPClient(base_url, username, password, cache=cache)
+    """
+    
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize cache.
+        
+        Args:
+            directory: Directory for persistent entries (memory only if None)
+        """
+        self.directory = directory
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    
+    @classmethod
+    def on_disk(cls, directory: Optional[str] = None) -> 'StateCache':
+        """Create a cache persisted in directory (defaults to the user cache dir)"""
+        return cls(directory or default_cache_dir())
+    
+    def _path(self, key: Tuple[str, str]) -> str:
+        """Get the file path of an entry"""
+        digest = hashlib.sha256('\0'.join(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+    
+    def get(self, scope: str, name: str) -> Optional[Tuple[Optional[str], Any]]:
+        """
+        Get a cached entry.
+        
+        Args:
+            scope: Cache scope (e.g., account ID or session URL)
+            name: Entry name (e.g., 'Mailbox/get')
+        
+        Returns:
+            (state, data) tuple, or None if not cached
+        """
+        key = (scope, name)
+        entry = self._entries.get(key)
+        
+        if entry is None and self.directory:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    entry = _json.loads(f.read())
+            except (OSError, ValueError):
+                return None
+            self._entries[key] = entry
+        
+        if entry is None:
+            return None
+        return entry.get('state'), entry.get('data')
+    
+    def set(self, scope: str, name: str, state: Optional[str], data: Any) -> None:
+        """
+        Store an entry.
+        
+        Args:
+            scope: Cache scope (e.g., account ID or session URL)
+            name: Entry name (e.g., 'Mailbox/get')
+            state: State string the data was fetched at
+            data: JSON-serializable data
+        """
+        key = (scope, name)
+        entry = {'state': state, 'data': data}
+        self._entries[key] = entry
+        
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                # Write then rename so readers never see a partial file
+                path = self._path(key)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(_json.dumps(entry))
+                os.replace(tmp_path, path)
+            except OSError:
+                # The cache is an optimization; never fail a request over it
+                pass
+    
+    def delete(self, scope: str, name: str) -> None:
+        """Remove an entry"""
+        key = (scope, name)
+        self._entries.pop(key, None)
+        
+        if self.directory:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+    
+    def clear(self) -> None:
+        """Remove all in-memory entries (disk entries are left in place)"""
+        self._entries.clear()
@@ -2,11 +2,433 @@
 JMAP Client - Main client class for JMAP operations
 """
 
-import requests
-from typing import Dict, List, Any, Optional
-from .session import JMAPSession
-from .mailbox import MailboxTree
-from .exceptions import JMAPNetworkError, JMAPServerError, JMAPMethodError
+import hashlib
+import itertools
+from functools import lru_cache
+from typing import Callable, Dict, List, Any, Iterator, Optional, Sequence, Tuple, Union
+from . import _json
+from .session import JMAPSession, TRANSPORT_ERRORS, request_not_processed
+from .cache import StateCache
+from .mailbox import MailboxList, MailboxTree
+from .email import EmailQuery, to_jmap_filter
+from .exceptions import (
+    JMAPNetworkError,
+    JMAPServerError,
+    JMAPMethodError,
+    JMAPInvalidRequestError,
+)
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# simdjson only beats the stdlib parser: orjson decodes a whole response
+# faster than simdjson converts the one subtree a call needs
+_USE_SIMDJSON = simdjson is not None and _json.BACKEND == 'json'
+
+
+# Capabilities declared when a request does not specify `using`
+_DEFAULT_USING = ('urn:ietf:params:jmap:core', 'urn:ietf:params:jmap:mail')
+
+# Capabilities for identity lookups and sending
+_IDENTITY_USING = ('urn:ietf:params:jmap:core', 'urn:ietf:params:jmap:submission')
+_SUBMISSION_USING = _DEFAULT_USING + ('urn:ietf:params:jmap:submission',)
+
+
+@lru_cache(maxsize=32)
+def _request_prefix(using: Tuple[str, ...]) -> bytes:
+    """Constant head of a request body for a capability list, encoded once"""
+    return b'{"using":' + _json.dumps(using) + b',"methodCalls":'
+
+
+def _encode_request(method_calls: List[List[Any]], using: Optional[Sequence[str]] = None) -> bytes:
+    """Encode a JMAP Request object around a pre-encoded `using` head"""
+    using = _DEFAULT_USING if using is None else tuple(using)
+    return _request_prefix(using) + _json.dumps(method_calls) + b'}'
+
+
+def _email_query_args(
+    account_id: str,
+    filter: Union[Dict, EmailQuery, List, None],
+    sort: Optional[List[Dict]],
+    limit: Optional[int]
+) -> Dict[str, Any]:
+    """Build Email/query arguments, leaving out unset options"""
+    query_args = {
+        'accountId': account_id
+    }
+    
+    if filter is not None:
+        query_args['filter'] = to_jmap_filter(filter)
+    if sort is not None:
+        query_args['sort'] = sort
+    if limit is not None:
+        query_args['limit'] = limit
+    
+    return query_args
+
+
+def _email_get_args(
+    account_id: str,
+    ids: Optional[List[str]],
+    properties: Optional[List[str]]
+) -> Dict[str, Any]:
+    """Build Email/get arguments, leaving out unset options"""
+    get_args = {
+        'accountId': account_id,
+        'ids': ids
+    }
+    
+    if properties is not None:
+        get_args['properties'] = properties
+    
+    return get_args
+
+
+def _send_email_calls(account_id: str, email: Dict, identity_id: Optional[str]) -> List[List[Any]]:
+    """
+    Build the Email/set + EmailSubmission/set pair that sends an email.
+    
+    The draft is created as 'draft' (call c1) and submitted by creation
+    reference (call c2); the email is kept so it appears in Sent.
+    """
+    return [
+        ['Email/set', {
+            'accountId': account_id,
+            'create': {'draft': email}
+        }, 'c1'],
+        ['EmailSubmission/set', {
+            'accountId': account_id,
+            'create': {
+                'submission': {
+                    'emailId': '#draft',
+                    'identityId': identity_id or '$default'
+                }
+            }
+        }, 'c2']
+    ]
+
+
+# Email properties needed to render a message list
+ENVELOPE_PROPERTIES = [
+    'id', 'threadId', 'mailboxIds', 'keywords', 'from', 'to',
+    'subject', 'receivedAt', 'size', 'preview', 'hasAttachment'
+]
+
+
+def _iter_response_list(reader) -> Iterator[Dict]:
+    """
+    Incrementally parse a JMAP response, yielding each item of a 'list' result.
+    
+    Only one item is held in memory at a time. Raises JMAPMethodError if a
+    method call returned an error.
+    """
+    response_prefix = 'methodResponses.item.item'
+    item_prefix = response_prefix + '.list.item'
+    
+    builder = None
+    error_builder = None
+    position = 0
+    is_error = False
+    
+    for prefix, event, value in ijson.parse(reader):
+        if prefix == 'methodResponses.item' and event == 'start_array':
+            # New [name, arguments, callId] triple
+            position = 0
+            is_error = False
+            continue
+        
+        if error_builder is not None:
+            error_builder.event(event, value)
+            if prefix == response_prefix and event == 'end_map':
+                error = error_builder.value
+                raise JMAPMethodError(
+                    f"Method error: {error.get('description', 'Unknown error')}",
+                    error_type=error.get('type', 'unknown')
+                )
+            continue
+        
+        if prefix == response_prefix:
+            if position == 0 and event == 'string' and value == 'error':
+                is_error = True
+            elif position == 1 and event == 'start_map' and is_error:
+                error_builder = ijson.ObjectBuilder()
+                error_builder.event(event, value)
+                continue
+            if event in ('string', 'start_map', 'start_array', 'number', 'null', 'boolean'):
+                position += 1
+        
+        if builder is None:
+            if prefix == item_prefix and event == 'start_map':
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+        else:
+            builder.event(event, value)
+            if prefix == item_prefix and event == 'end_map':
+                yield builder.value
+                builder = None
+
+
+def _extract_method(parser, content: bytes, call_id: str) -> Tuple[Dict, Optional[str]]:
+    """
+    Extract one method response from a JMAP response body with simdjson.
+    
+    Only the arguments of the response for call_id (and of error responses)
+    are converted to Python objects; the rest of the document is skipped.
+    
+    The parser is reused between calls, which simdjson only allows once no
+    object from the previous document is alive. Everything returned here
+    is a plain Python object, and the document is released before raising.
+    
+    Args:
+        parser: simdjson.Parser to parse with
+        content: Response body
+        call_id: callId of the response to extract
+    
+    Returns:
+        (arguments, sessionState) tuple; arguments is {} if call_id is missing
+    
+    Raises:
+        JMAPServerError: If the body is not a valid JMAP response
+        JMAPMethodError: If any method call returned an error
+    """
+    try:
+        try:
+            doc = parser.parse(content)
+        except RuntimeError:
+            # A document from an earlier parse is still referenced somewhere
+            doc = simdjson.Parser().parse(content)
+    except ValueError as e:
+        raise JMAPServerError(f"Invalid JSON response: {e}")
+    
+    if not isinstance(doc, simdjson.Object):
+        del doc
+        raise JMAPServerError("Invalid JMAP response: expected an object")
+    
+    result = error = None
+    for method_response in doc.get('methodResponses') or ():
+        if method_response[0] == 'error':
+            error = method_response[1].as_dict()
+            break
+        if result is None and method_response[2] == call_id:
+            result = method_response[1].as_dict()
+    
+    session_state = doc.get('sessionState')
+    method_response = doc = None
+    
+    if error is not None:
+        raise JMAPMethodError(
+            f"Method error: {error.get('description', 'Unknown error')}",
+            error_type=error.get('type', 'unknown'),
+            session_state=session_state
+        )
+    
+    return result or {}, session_state
+
+
+class PipelineResult:
+    """
+    Placeholder for the result of a call queued on a Pipeline.
+    
+    The value becomes available once the pipeline has been executed.
+    """
+    
+    def __init__(self, call_id: str, method: str, convert: Optional[Callable[[Dict], Any]] = None):
+        self.call_id = call_id
+        self.method = method
+        self._convert = convert
+        self._value = None
+        self._done = False
+    
+    def done(self) -> bool:
+        """Check whether the call has been sent and its result resolved"""
+        return self._done
+    
+    def result(self) -> Any:
+        """
+        Get the result of the call.
+        
+        Raises:
+            JMAPInvalidRequestError: If the pipeline has not been executed yet
+        """
+        if not self._done:
+            raise JMAPInvalidRequestError(
+                f"Result of {self.method} call '{self.call_id}' is not available before execute()"
+            )
+        return self._value
+    
+    def _resolve(self, arguments: Dict) -> None:
+        """Set the result from the call's response arguments"""
+        self._value = arguments if self._convert is None else self._convert(arguments)
+        self._done = True
+    
+    def __repr__(self):
+        state = 'done' if self._done else 'pending'
+        return f"PipelineResult({self.method}, {self.call_id!r}, {state})"
+
+
+class Pipeline:
+    """
+    Collects method calls and sends them as a single JMAP request.
+    
+    Created by JMAPClient.pipeline(). Each helper queues one method call and
+    returns a PipelineResult; execute() sends all queued calls in one round
+    trip and resolves the results by callId. Leaving a with block executes
+    any calls still queued.
+    
+    Passing a query_emails() result as the ids of get_emails() chains the
+    two calls with a result reference, so the IDs never leave the server.
+    
+    Example:
+        >>> with client.pipeline() as p:
+        ...     mailboxes = p.get_mailboxes()
+        ...     ids = p.query_emails(filter={'notKeyword': '$seen'}, limit=20)
+        ...     emails = p.get_emails(ids, properties=['subject'])
+        >>> for email in emails.result():
+        ...     print(email['subject'])
+    """
+    
+    def __init__(self, client: 'JMAPClient'):
+        self.client = client
+        self._calls: List[List[Any]] = []
+        self._results: List[PipelineResult] = []
+        self._using: List[str] = list(_DEFAULT_USING)
+    
+    def __enter__(self) -> 'Pipeline':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # Don't send a half-built batch when the block raised
+        if exc_type is None and self._calls:
+            self.execute()
+    
+    def __len__(self) -> int:
+        return len(self._calls)
+    
+    def add(
+        self,
+        method: str,
+        arguments: Dict[str, Any],
+        using: Optional[Sequence[str]] = None,
+        convert: Optional[Callable[[Dict], Any]] = None
+    ) -> PipelineResult:
+        """
+        Queue a method call.
+        
+        Args:
+            method: Method name (e.g., 'Thread/get')
+            arguments: Method arguments
+            using: Capability URIs the call needs besides core and mail
+            convert: Function turning the response arguments into the
+                result value (the raw arguments are used if None)
+        
+        Returns:
+            PipelineResult for the call
+        """
+        for capability in using or ():
+            if capability not in self._using:
+                self._using.append(capability)
+        
+        result = PipelineResult(self.client._next_request_id(), method, convert)
+        self._calls.append([method, arguments, result.call_id])
+        self._results.append(result)
+        return result
+    
+    def get_mailboxes(self, account_id: Optional[str] = None) -> PipelineResult:
+        """Queue JMAPClient.get_mailboxes(); resolves to a MailboxList"""
+        return self.add('Mailbox/get', {
+            'accountId': self.client._account_id(account_id),
+            'ids': None
+        }, convert=lambda result: MailboxList(result.get('list', [])))
+    
+    def get_identities(self, account_id: Optional[str] = None) -> PipelineResult:
+        """Queue JMAPClient.get_identities(); resolves to a list of identities"""
+        return self.add('Identity/get', {
+            'accountId': self.client._account_id(account_id),
+            'ids': None
+        }, using=_IDENTITY_USING, convert=lambda result: result.get('list', []))
+    
+    def query_emails(
+        self,
+        filter: Union[Dict, EmailQuery, List, None] = None,
+        sort: Optional[List[Dict]] = None,
+        limit: Optional[int] = None,
+        account_id: Optional[str] = None
+    ) -> PipelineResult:
+        """Queue JMAPClient.query_emails(); resolves to a list of email IDs"""
+        query_args = _email_query_args(self.client._account_id(account_id), filter, sort, limit)
+        return self.add('Email/query', query_args, convert=lambda result: result.get('ids', []))
+    
+    def get_emails(
+        self,
+        ids: Union[List[str], PipelineResult],
+        properties: Optional[List[str]] = None,
+        account_id: Optional[str] = None
+    ) -> PipelineResult:
+        """
+        Queue JMAPClient.get_emails(); resolves to a list of email objects.
+        
+        Args:
+            ids: List of email IDs, or the result of a query_emails() call
+                queued on this pipeline
+            properties: Properties to fetch (fetches all if None)
+            account_id: Account ID (uses primary if not specified)
+        
+        Raises:
+            JMAPInvalidRequestError: If ids is the result of another method
+        """
+        account_id = self.client._account_id(account_id)
+        
+        if isinstance(ids, PipelineResult):
+            if ids.method != 'Email/query':
+                raise JMAPInvalidRequestError(
+                    f"ids must be an Email/query result, not {ids.method} call '{ids.call_id}'"
+                )
+            if ids.done():
+                ids = ids.result()
+        
+        if isinstance(ids, PipelineResult):
+            get_args = {
+                'accountId': account_id,
+                '#ids': self.client.result_reference(ids.call_id, ids.method, '/ids')
+            }
+            if properties is not None:
+                get_args['properties'] = properties
+        else:
+            get_args = _email_get_args(account_id, ids, properties)
+        
+        return self.add('Email/get', get_args, convert=lambda result: result.get('list', []))
+    
+    def execute(self) -> List[Any]:
+        """
+        Send all queued calls in one request and resolve their results.
+        
+        The pipeline is empty afterwards and can queue new calls.
+        
+        Returns:
+            Result values of the queued calls, in the order they were added
+        
+        Raises:
+            JMAPNetworkError: On network errors
+            JMAPServerError: On server errors
+            JMAPMethodError: If any call returned an error (no result is resolved)
+        """
+        calls, pending, using = self._calls, self._results, self._using
+        self._calls, self._results, self._using = [], [], list(_DEFAULT_USING)
+        if not calls:
+            return []
+        
+        results = self.client.call_batch(calls, using=using)
+        for result in pending:
+            result._resolve(results.get(result.call_id, {}))
+        
+        return [result.result() for result in pending]
 
 
 class JMAPClient:
@@ -28,7 +450,12 @@ class JMAPClient:
         username: str,
         password: str,
         timeout: int = 30,
-        use_bearer_token: bool = False
+        use_bearer_token: bool = False,
+        http2: bool = True,
+        cache: Optional[StateCache] = None,
+        pool_maxsize: int = 20,
+        retries: int = 3,
+        compress_requests: bool = False
     ):
         """
         Initialize JMAP client.
@@ -39,17 +466,68 @@ class JMAPClient:
             password: Password, app password, or API token (e.g., Fastmail API key)
             timeout: HTTP request timeout in seconds
             use_bearer_token: Use Bearer token auth (auto-detected for Fastmail API keys)
+            http2: Use HTTP/2 when the optional httpx/h2 packages are installed
+                (falls back to requests over HTTP/1.1 otherwise)
+            cache: StateCache for the session object and mailbox list; cached
+                data is revalidated against the server's state strings
+            pool_maxsize: Maximum number of kept-alive connections per host
+            retries: Retries for failed connections (and 502/503/504 on GETs)
+            compress_requests: zstd-compress request bodies over 16 KiB, e.g.
+                large drafts in send_email (the server must accept
+                Content-Encoding: zstd; raises ImportError without the
+                zstandard package)
         """
-        self.session = JMAPSession(base_url, username, password, timeout, use_bearer_token)
-        self._request_id = 0
+        self.session = JMAPSession(
+            base_url, username, password, timeout, use_bearer_token, http2,
+            pool_maxsize=pool_maxsize, retries=retries, compress_requests=compress_requests
+        )
+        self.cache = cache
+        self._request_ids = itertools.count(1)
+        
+        # Reused for every simdjson decode so its buffers are allocated once
+        self._json_parser = simdjson.Parser() if _USE_SIMDJSON else None
+        self._session_from_cache = False
+    
+    @property
+    def _session_cache_scope(self) -> str:
+        """Cache scope of the session object (one per server and credentials)"""
+        # With API keys the username is a placeholder, so the credentials
+        # themselves (hashed, never stored) tell sessions apart
+        authorization = self.session._auth_header['Authorization'].encode('utf-8')
+        fingerprint = hashlib.sha256(authorization).hexdigest()[:16]
+        return f"{self.session.base_url}|{self.session.username}|{fingerprint}"
+    
+    def _account_cache_scope(self, account_id: str) -> str:
+        """Cache scope of an account's data (account IDs are only unique per server)"""
+        return f"{self._session_cache_scope}|{account_id}"
     
     def connect(self) -> None:
         """
         Connect to JMAP server and discover capabilities.
         
-        This must be called before making any API requests.
+        This must be called before making any API requests. With a cache,
+        a previously discovered session is reused; it is refetched when an
+        API response reports a different sessionState.
         """
+        if self.cache is not None:
+            cached = self.cache.get(self._session_cache_scope, 'session')
+            if cached and cached[1]:
+                self.session._load_session_data(cached[1])
+                self._session_from_cache = True
+                return
+        
+        self._discover_session()
+    
+    def _discover_session(self) -> None:
+        """Fetch the session object from the server and cache it"""
         self.session.discover_session()
+        self._session_from_cache = False
+        
+        if self.cache is not None:
+            self.cache.set(
+                self._session_cache_scope, 'session',
+                self.session.state, self.session.session_data
+            )
     
     def close(self) -> None:
         """Close the JMAP client session"""
@@ -235,15 +713,22 @@ class JMAPClient:
         
         print("\n" + "=" * 70)
     
+    def _account_id(self, account_id: Optional[str]) -> str:
+        """Resolve account_id, defaulting to the primary mail account"""
+        if account_id is None:
+            return self.session.get_account_id()
+        return account_id
+    
     def _next_request_id(self) -> str:
         """Generate next request ID"""
-        self._request_id += 1
-        return f"req{self._request_id}"
+        # next() on itertools.count is a single C call, so concurrent callers
+        # (threads sharing a client) can never get the same ID
+        return f"req{next(self._request_ids)}"
     
     def make_request(
         self,
         method_calls: List[List[Any]],
-        using: Optional[List[str]] = None
+        using: Optional[Sequence[str]] = None
     ) -> Dict:
         """
         Make a JMAP API request.
@@ -259,46 +744,245 @@ class JMAPClient:
             JMAPNetworkError: On network errors
             JMAPServerError: On server errors
         """
-        if using is None:
-            using = [
-                'urn:ietf:params:jmap:core',
-                'urn:ietf:params:jmap:mail'
-            ]
-        
-        request_data = {
-            'using': using,
-            'methodCalls': method_calls
-        }
+        response_data, _ = self._receive(self._send(method_calls, using))
+        return response_data
+    
+    def _send(self, method_calls: List[List[Any]], using: Optional[Sequence[str]] = None) -> bytes:
+        """POST a JMAP request and return the raw response body"""
+        # Encode ourselves so the fast JSON backend is used for the body
+        body = _encode_request(method_calls, using)
         
         try:
-            response = self.session.session.post(
+            response = self.session.post(
                 self.session.api_url,
-                json=request_data,
-                timeout=self.session.timeout
+                body,
+                headers={'Content-Type': 'application/json'}
             )
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            raise JMAPNetworkError(f"Request failed: {e}")
+        except TRANSPORT_ERRORS as e:
+            if not self._session_from_cache:
+                raise JMAPNetworkError(f"Request failed: {e}")
+            
+            # A cached session may point at an outdated API URL: rediscover,
+            # but only resend if the server provably never ran the calls
+            # (they may not be idempotent, e.g. EmailSubmission/set)
+            self._discover_session()
+            if not request_not_processed(e):
+                raise JMAPNetworkError(f"Request failed: {e}")
+            try:
+                response = self.session.post(
+                    self.session.api_url,
+                    body,
+                    headers={'Content-Type': 'application/json'}
+                )
+            except TRANSPORT_ERRORS as e:
+                raise JMAPNetworkError(f"Request failed: {e}")
+        
+        return response.content
+    
+    def _check_session_state(self, session_state: Optional[str]) -> None:
+        """Rediscover the session if the server reports a new session state"""
+        # The session object changed on the server (RFC 8620 Section 3.4)
+        if session_state and self.session.state and session_state != self.session.state:
+            self._discover_session()
+    
+    def _receive(self, content: bytes) -> Tuple[Dict, Dict[str, Dict]]:
+        """
+        Parse a response body and check its sessionState.
         
+        The state is checked before a method error propagates, since errors
+        like accountNotFound often mean the session itself is outdated.
+        """
         try:
-            response_data = response.json()
+            response_data, results = self._parse_response(content)
+        except JMAPMethodError as e:
+            self._check_session_state(e.session_state)
+            raise
+        
+        self._check_session_state(response_data.get('sessionState'))
+        return response_data, results
+    
+    @staticmethod
+    def _parse_response(content: bytes) -> Tuple[Dict, Dict[str, Dict]]:
+        """
+        Decode a JMAP response body, raise on method-level errors and index
+        the results by callId, all in one pass over methodResponses.
+        
+        Returns:
+            (response, results) tuple; results maps each callId to the
+            arguments of its first response (later responses with the same
+            callId, e.g. implicit Email/set calls, don't replace it)
+        
+        Raises:
+            JMAPServerError: If the body is not valid JSON
+            JMAPMethodError: If any method call returned an error
+        """
+        try:
+            response_data = _json.loads(content)
         except ValueError as e:
             raise JMAPServerError(f"Invalid JSON response: {e}")
         
-        # Check for errors in method responses
-        if 'methodResponses' in response_data:
-            for method_response in response_data['methodResponses']:
-                if method_response[0] == 'error':
-                    error_type = method_response[1].get('type', 'unknown')
-                    description = method_response[1].get('description', 'Unknown error')
-                    raise JMAPMethodError(
-                        f"Method error: {description}",
-                        error_type=error_type
-                    )
+        if not isinstance(response_data, dict):
+            raise JMAPServerError(
+                f"Invalid JMAP response: expected an object, got {type(response_data).__name__}"
+            )
         
-        return response_data
+        results = {}
+        for name, arguments, call_id in response_data.get('methodResponses', []):
+            if name == 'error':
+                raise JMAPMethodError(
+                    f"Method error: {arguments.get('description', 'Unknown error')}",
+                    error_type=arguments.get('type', 'unknown'),
+                    session_state=response_data.get('sessionState')
+                )
+            results.setdefault(call_id, arguments)
+        
+        return response_data, results
+    
+    @staticmethod
+    def result_reference(call_id: str, name: str, path: str) -> Dict[str, str]:
+        """
+        Build a JMAP result reference (RFC 8620 Section 3.7).
+        
+        Use it as the value of a '#'-prefixed argument to feed the output of
+        an earlier call in the same batch into a later one.
+        
+        Example:
+            >>> args = {'#ids': client.result_reference('q', 'Email/query', '/ids')}
+        """
+        return {'resultOf': call_id, 'name': name, 'path': path}
     
-    def get_mailboxes(self, account_id: Optional[str] = None) -> List[Dict]:
+    @staticmethod
+    def _order_calls(method_calls: List[List[Any]]) -> List[List[Any]]:
+        """
+        Order method calls so every result reference points to an earlier call.
+        
+        The server processes calls sequentially, so a referenced call must come
+        first. Calls keep their original relative order where possible.
+        """
+        call_ids = [call[2] for call in method_calls]
+        known = set(call_ids)
+        
+        depends_on = {}
+        for call in method_calls:
+            deps = set()
+            for key, value in call[1].items():
+                if key.startswith('#') and isinstance(value, dict):
+                    ref = value.get('resultOf')
+                    if ref not in known:
+                        raise JMAPInvalidRequestError(
+                            f"Call '{call[2]}' references unknown call '{ref}'"
+                        )
+                    deps.add(ref)
+            depends_on[call[2]] = deps
+        
+        ordered = []
+        emitted = set()
+        pending = list(method_calls)
+        while pending:
+            for i, call in enumerate(pending):
+                if depends_on[call[2]] <= emitted:
+                    ordered.append(pending.pop(i))
+                    emitted.add(call[2])
+                    break
+            else:
+                raise JMAPInvalidRequestError(
+                    f"Circular result references between calls: {[c[2] for c in pending]}"
+                )
+        
+        return ordered
+    
+    def call_batch(
+        self,
+        method_calls: List[List[Any]],
+        using: Optional[Sequence[str]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Send several method calls in a single JMAP request.
+        
+        Calls may depend on each other through result references, so a
+        query and the fetch of its results cost one round trip instead of two.
+        
+        Args:
+            method_calls: List of [methodName, arguments] or
+                [methodName, arguments, callId]; missing call IDs are generated
+            using: List of capability URIs to declare
+        
+        Returns:
+            Dict mapping each callId to the arguments of its response
+        
+        Example:
+            >>> results = client.call_batch([
+            ...     ['Email/query', {'filter': {'inMailbox': inbox_id}, 'limit': 10}, 'q'],
+            ...     ['Email/get', {'#ids': client.result_reference('q', 'Email/query', '/ids'),
+            ...                    'properties': ['subject', 'from']}, 'g'],
+            ... ])
+            >>> emails = results['g']['list']
+        """
+        _, results = self._receive(self._send(self._prepare_batch(method_calls), using))
+        return results
+    
+    def _prepare_batch(self, method_calls: List[List[Any]]) -> List[List[Any]]:
+        """Assign missing call IDs and order calls by their result references"""
+        calls = []
+        for call in method_calls:
+            if len(call) == 2:
+                call = [call[0], call[1], self._next_request_id()]
+            calls.append(list(call))
+        
+        return self._order_calls(calls)
+    
+    def pipeline(self) -> Pipeline:
+        """
+        Collect method calls to send as a single request.
+        
+        The returned Pipeline mirrors get_mailboxes(), get_identities(),
+        query_emails() and get_emails(), but each helper only queues its
+        call and returns a PipelineResult. execute(), or leaving the with
+        block, sends everything queued in one round trip.
+        
+        Returns:
+            Empty Pipeline bound to this client
+        
+        Example:
+            >>> with client.pipeline() as p:
+            ...     mailboxes = p.get_mailboxes()
+            ...     unread = p.query_emails(filter={'notKeyword': '$seen'})
+            >>> print(len(mailboxes.result()), len(unread.result()))
+        """
+        return Pipeline(self)
+    
+    # Responses smaller than this skip simdjson: for tiny bodies the
+    # parser setup outweighs the savings (tunable per subclass/instance)
+    _SIMD_THRESHOLD = 4096
+    
+    def _call(
+        self,
+        method: str,
+        arguments: Dict[str, Any],
+        using: Optional[Sequence[str]] = None
+    ) -> Dict:
+        """Make a single method call and return its response arguments"""
+        call_id = self._next_request_id()
+        
+        if self._json_parser is None:
+            return self.call_batch([[method, arguments, call_id]], using=using).get(call_id, {})
+        
+        content = self._send([[method, arguments, call_id]], using)
+        
+        if len(content) < self._SIMD_THRESHOLD:
+            return self._receive(content)[1].get(call_id, {})
+        
+        # Large body: convert only this call's response
+        try:
+            result, session_state = _extract_method(self._json_parser, content, call_id)
+        except JMAPMethodError as e:
+            self._check_session_state(e.session_state)
+            raise
+        
+        self._check_session_state(session_state)
+        return result
+    
+    def get_mailboxes(self, account_id: Optional[str] = None) -> MailboxList:
         """
         Get all mailboxes.
         
@@ -306,49 +990,269 @@ class JMAPClient:
             account_id: Account ID (uses primary if not specified)
         
         Returns:
-            List of mailbox objects
+            List of mailbox objects, with a by_role index
+            (e.g., mailboxes.by_role.get('inbox'))
         """
-        if account_id is None:
-            account_id = self.session.get_account_id()
+        return MailboxList(self._get_all_mailboxes(account_id).get('list', []))
+    
+    def _get_all_mailboxes(self, account_id: Optional[str] = None) -> Dict:
+        """
+        Fetch all mailboxes, returning the full Mailbox/get response (list and state).
         
-        method_calls = [
-            [
-                'Mailbox/get',
-                {
-                    'accountId': account_id,
-                    'ids': None  # Get all mailboxes
-                },
-                self._next_request_id()
-            ]
-        ]
+        With a cache, only mailboxes changed since the cached state are
+        fetched (Mailbox/changes); an unchanged account costs one small
+        response instead of the whole mailbox list.
+        """
+        account_id = self._account_id(account_id)
+        scope = self._account_cache_scope(account_id)
+        
+        if self.cache is not None:
+            cached = self.cache.get(scope, 'Mailbox/get')
+            if cached and cached[0]:
+                result = self._sync_mailboxes(account_id, cached[0], cached[1])
+                if result is not None:
+                    if result['state'] != cached[0]:
+                        self.cache.set(scope, 'Mailbox/get', result['state'], result['list'])
+                    return result
+        
+        result = self._call('Mailbox/get', {
+            'accountId': account_id,
+            'ids': None  # Get all mailboxes
+        })
         
-        response = self.make_request(method_calls)
+        if self.cache is not None:
+            self.cache.set(scope, 'Mailbox/get', result.get('state'), result.get('list', []))
         
-        # Extract mailbox list from response
-        for method_response in response['methodResponses']:
-            if method_response[0] == 'Mailbox/get':
-                return method_response[1]['list']
+        return result
+    
+    def _sync_mailboxes(
+        self,
+        account_id: str,
+        since_state: str,
+        mailboxes: List[Dict]
+    ) -> Optional[Dict]:
+        """
+        Bring a cached mailbox list up to date with Mailbox/changes.
         
-        return []
+        Returns:
+            Dict with 'list' and 'state', or None if the changes cannot be
+            applied and the full list must be fetched
+        """
+        try:
+            results = self.call_batch([
+                ['Mailbox/changes', {'accountId': account_id, 'sinceState': since_state}, 'mc'],
+                ['Mailbox/get', {
+                    'accountId': account_id,
+                    '#ids': self.result_reference('mc', 'Mailbox/changes', '/created')
+                }, 'mcreated'],
+                ['Mailbox/get', {
+                    'accountId': account_id,
+                    '#ids': self.result_reference('mc', 'Mailbox/changes', '/updated')
+                }, 'mupdated']
+            ])
+        except JMAPMethodError:
+            # e.g. cannotCalculateChanges: the server no longer knows the state
+            return None
+        
+        changes = results.get('mc', {})
+        if 'newState' not in changes or changes.get('hasMoreChanges'):
+            return None
+        
+        destroyed = set(changes.get('destroyed') or [])
+        fetched = {}
+        for call_id in ('mcreated', 'mupdated'):
+            for mailbox in results.get(call_id, {}).get('list', []):
+                fetched[mailbox['id']] = mailbox
+        
+        if not destroyed and not fetched:
+            return {'list': mailboxes, 'state': changes['newState']}
+        
+        merged = []
+        for mailbox in mailboxes:
+            if mailbox['id'] in destroyed:
+                continue
+            merged.append(fetched.pop(mailbox['id'], mailbox))
+        merged.extend(fetched.values())
+        
+        return {'list': merged, 'state': changes['newState']}
     
-    def get_mailbox_tree(self, account_id: Optional[str] = None) -> MailboxTree:
+    def get_mailbox_tree(
+        self,
+        account_id: Optional[str] = None,
+        prefetch: bool = False,
+        prefetch_count: int = 20,
+        prefetch_roles: Tuple[str, ...] = ('inbox', 'sent', 'drafts'),
+        prefetch_properties: Optional[List[str]] = None
+    ) -> MailboxTree:
         """
         Get mailbox tree structure for easy navigation.
         
         Args:
             account_id: Account ID (uses primary if not specified)
+            prefetch: Also load the newest envelopes of the prefetch_roles
+                mailboxes (one extra request for all of them)
+            prefetch_count: Number of envelopes to prefetch per mailbox
+            prefetch_roles: Roles of the mailboxes to prefetch
+            prefetch_properties: Email properties to prefetch
+                (defaults to ENVELOPE_PROPERTIES)
         
         Returns:
             MailboxTree object with hierarchical mailbox structure
         
         Example:
-            >>> tree = client.get_mailbox_tree()
+            >>> tree = client.get_mailbox_tree(prefetch=True)
             >>> tree.print_tree()
             >>> inbox = tree.get_by_role('inbox')
             >>> print(f"Inbox has {inbox.total_emails} emails")
+            >>> for envelope in inbox.cached_envelopes or []:
+            ...     print(envelope['subject'])
+        """
+        result = self._get_all_mailboxes(account_id)
+        tree = MailboxTree(result.get('list', []), state=result.get('state'))
+        
+        if prefetch:
+            self.prefetch_envelopes(
+                tree,
+                count=prefetch_count,
+                roles=prefetch_roles,
+                properties=prefetch_properties,
+                account_id=account_id
+            )
+        
+        return tree
+    
+    def bootstrap(
+        self,
+        role: str = 'inbox',
+        email_properties: Optional[List[str]] = None,
+        limit: int = 50,
+        account_id: Optional[str] = None
+    ) -> Tuple[MailboxTree, List[str], List[Dict]]:
         """
-        mailboxes = self.get_mailboxes(account_id)
-        return MailboxTree(mailboxes)
+        Load the mailbox tree and the newest emails of one mailbox.
+        
+        Email/query needs the mailbox ID, which a result reference cannot
+        pick out of Mailbox/get by role. When the ID is known from the
+        cache, Mailbox/get, Email/query and Email/get go out as one request;
+        otherwise the mailboxes are fetched first (two requests).
+        
+        Args:
+            role: Role of the mailbox to list (e.g., 'inbox')
+            email_properties: Email properties to fetch (defaults to ENVELOPE_PROPERTIES)
+            limit: Maximum number of emails
+            account_id: Account ID (uses primary if not specified)
+        
+        Returns:
+            (mailbox_tree, email_ids, emails) tuple; the lists are empty if
+            no mailbox has the role
+        
+        Example:
+            >>> client = JMAPClient(base_url, username, password, cache=StateCache.on_disk())
+            >>> tree, ids, emails = client.bootstrap()
+        """
+        account_id = self._account_id(account_id)
+        if email_properties is None:
+            email_properties = ENVELOPE_PROPERTIES
+        
+        def email_calls(mailbox_id: str) -> List[List[Any]]:
+            return [
+                ['Email/query', {
+                    'accountId': account_id,
+                    'filter': {'inMailbox': mailbox_id},
+                    'sort': [{'property': 'receivedAt', 'isAscending': False}],
+                    'limit': limit
+                }, 'q1'],
+                ['Email/get', {
+                    'accountId': account_id,
+                    '#ids': self.result_reference('q1', 'Email/query', '/ids'),
+                    'properties': email_properties
+                }, 'g1']
+            ]
+        
+        guessed_id = None
+        if self.cache is not None:
+            cached = self.cache.get(self._account_cache_scope(account_id), 'Mailbox/get')
+            if cached:
+                guessed_id = (MailboxList(cached[1] or []).by_role.get(role) or {}).get('id')
+        
+        if guessed_id is not None:
+            results = self.call_batch([
+                ['Mailbox/get', {'accountId': account_id, 'ids': None}, 'm1'],
+                *email_calls(guessed_id)
+            ])
+            mailbox_result = results.get('m1', {})
+            if self.cache is not None:
+                self.cache.set(
+                    self._account_cache_scope(account_id), 'Mailbox/get',
+                    mailbox_result.get('state'), mailbox_result.get('list', [])
+                )
+        else:
+            results = {}
+            mailbox_result = self._get_all_mailboxes(account_id)
+        
+        tree = MailboxTree(mailbox_result.get('list', []), state=mailbox_result.get('state'))
+        mailbox = tree.get_by_role(role)
+        if mailbox is None:
+            return tree, [], []
+        
+        if mailbox.id != guessed_id:
+            # No cached ID, or the role moved to another mailbox
+            results = self.call_batch(email_calls(mailbox.id))
+        
+        email_ids = results.get('q1', {}).get('ids', [])
+        emails = results.get('g1', {}).get('list', [])
+        return tree, email_ids, emails
+    
+    def prefetch_envelopes(
+        self,
+        tree: MailboxTree,
+        count: int = 20,
+        roles: Tuple[str, ...] = ('inbox', 'sent', 'drafts'),
+        properties: Optional[List[str]] = None,
+        account_id: Optional[str] = None
+    ) -> None:
+        """
+        Load the newest envelopes of role mailboxes into the tree's cache.
+        
+        Every mailbox gets a chained Email/query + Email/get pair, and all
+        pairs go out in a single request. Results are available as
+        mailbox.cached_envelopes (a snapshot; prefetch again to refresh).
+        
+        Args:
+            tree: Mailbox tree to fill
+            count: Number of envelopes per mailbox
+            roles: Roles of the mailboxes to prefetch
+            properties: Email properties to fetch (defaults to ENVELOPE_PROPERTIES)
+            account_id: Account ID (uses primary if not specified)
+        """
+        account_id = self._account_id(account_id)
+        if properties is None:
+            properties = ENVELOPE_PROPERTIES
+        
+        mailboxes = [tree.get_by_role(role) for role in roles]
+        mailboxes = [mailbox for mailbox in mailboxes if mailbox]
+        if not mailboxes:
+            return
+        
+        method_calls = []
+        for i, mailbox in enumerate(mailboxes):
+            method_calls.append(['Email/query', {
+                'accountId': account_id,
+                'filter': {'inMailbox': mailbox.id},
+                'sort': [{'property': 'receivedAt', 'isAscending': False}],
+                'limit': count
+            }, f'pq{i}'])
+            method_calls.append(['Email/get', {
+                'accountId': account_id,
+                '#ids': self.result_reference(f'pq{i}', 'Email/query', '/ids'),
+                'properties': properties
+            }, f'pg{i}'])
+        
+        results = self.call_batch(method_calls)
+        
+        for i, mailbox in enumerate(mailboxes):
+            emails = results.get(f'pg{i}', {}).get('list', [])
+            tree.set_cached_envelopes(mailbox.id, emails)
     
     def get_identities(self, account_id: Optional[str] = None) -> List[Dict]:
         """
@@ -365,37 +1269,18 @@ class JMAPClient:
             >>> for identity in identities:
             ...     print(f"{identity['name']} <{identity['email']}>")
         """
-        if account_id is None:
-            account_id = self.session.get_account_id()
+        account_id = self._account_id(account_id)
         
-        method_calls = [
-            [
-                'Identity/get',
-                {
-                    'accountId': account_id,
-                    'ids': None  # Get all identities
-                },
-                self._next_request_id()
-            ]
-        ]
-        
-        using = [
-            'urn:ietf:params:jmap:core',
-            'urn:ietf:params:jmap:submission'
-        ]
-        
-        response = self.make_request(method_calls, using=using)
-        
-        # Extract identity list from response
-        for method_response in response['methodResponses']:
-            if method_response[0] == 'Identity/get':
-                return method_response[1]['list']
+        result = self._call('Identity/get', {
+            'accountId': account_id,
+            'ids': None  # Get all identities
+        }, using=_IDENTITY_USING)
         
-        return []
+        return result.get('list', [])
     
     def query_emails(
         self,
-        filter: Optional[Dict] = None,
+        filter: Union[Dict, EmailQuery, List, None] = None,
         sort: Optional[List[Dict]] = None,
         limit: Optional[int] = None,
         account_id: Optional[str] = None
@@ -403,8 +1288,13 @@ class JMAPClient:
         """
         Query email IDs matching criteria.
         
+        Filtering runs on the server, so prefer a precise filter over
+        fetching emails and filtering them in Python.
+        
         Args:
-            filter: Filter criteria (e.g., {'inMailbox': 'mailbox-id'})
+            filter: Filter criteria (e.g., {'inMailbox': 'mailbox-id', 'notKeyword': '$seen'}),
+                an EmailQuery, an operator dict ({'operator': 'OR', 'conditions': [...]})
+                or a list of conditions to AND; datetime values are converted to UTCDates
             sort: Sort criteria (e.g., [{'property': 'receivedAt', 'isAscending': False}])
             limit: Maximum number of results
             account_id: Account ID (uses primary if not specified)
@@ -412,71 +1302,179 @@ class JMAPClient:
         Returns:
             List of email IDs
         """
-        if account_id is None:
-            account_id = self.session.get_account_id()
+        account_id = self._account_id(account_id)
         
-        query_args = {
-            'accountId': account_id
-        }
+        query_args = _email_query_args(account_id, filter, sort, limit)
+        return self._call('Email/query', query_args).get('ids', [])
+    
+    def query_and_get_emails(
+        self,
+        filter: Union[Dict, EmailQuery, List, None] = None,
+        sort: Optional[List[Dict]] = None,
+        limit: Optional[int] = None,
+        properties: Optional[List[str]] = None,
+        account_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Query emails and fetch them in a single request.
         
-        if filter is not None:
-            query_args['filter'] = filter
-        if sort is not None:
-            query_args['sort'] = sort
-        if limit is not None:
-            query_args['limit'] = limit
+        Email/get reads the IDs straight from the Email/query result, so this
+        costs one round trip where query_emails() + get_emails() cost two.
         
-        method_calls = [
-            ['Email/query', query_args, self._next_request_id()]
-        ]
+        Args:
+            filter: Filter criteria (see query_emails)
+            sort: Sort criteria (e.g., [{'property': 'receivedAt', 'isAscending': False}])
+            limit: Maximum number of results
+            properties: Properties to fetch (fetches all if None)
+            account_id: Account ID (uses primary if not specified)
         
-        response = self.make_request(method_calls)
+        Returns:
+            List of email objects, in query order
+        """
+        account_id = self._account_id(account_id)
         
-        for method_response in response['methodResponses']:
-            if method_response[0] == 'Email/query':
-                return method_response[1]['ids']
+        query_args = _email_query_args(account_id, filter, sort, limit)
+        get_args = {
+            'accountId': account_id,
+            '#ids': self.result_reference('q1', 'Email/query', '/ids')
+        }
+        if properties is not None:
+            get_args['properties'] = properties
         
-        return []
+        results = self.call_batch([
+            ['Email/query', query_args, 'q1'],
+            ['Email/get', get_args, 'g1']
+        ])
+        return results.get('g1', {}).get('list', [])
     
-    def get_emails(
+    def iter_emails(
         self,
-        ids: List[str],
+        filter: Union[Dict, EmailQuery, List, None] = None,
+        sort: Optional[List[Dict]] = None,
+        page_size: int = 200,
         properties: Optional[List[str]] = None,
         account_id: Optional[str] = None
-    ) -> List[Dict]:
+    ) -> Iterator[Dict]:
         """
-        Get email objects by IDs.
+        Iterate over all emails matching a query, one page at a time.
+        
+        Each page is a chained Email/query + Email/get request, so only one
+        page of emails is held in memory. Pages after the first are anchored
+        on the last ID seen, which keeps paging stable when emails arrive
+        or are removed at the top of the results.
         
         Args:
-            ids: List of email IDs
+            filter: Filter criteria (see query_emails)
+            sort: Sort criteria (e.g., [{'property': 'receivedAt', 'isAscending': False}])
+            page_size: Number of emails per request
             properties: Properties to fetch (fetches all if None)
             account_id: Account ID (uses primary if not specified)
         
-        Returns:
-            List of email objects
+        Yields:
+            Email objects
+        
+        Raises:
+            JMAPMethodError: If the anchor email was destroyed while paging
+                (error_type 'anchorNotFound')
+        
+        Example:
+            >>> for email in client.iter_emails({'inMailbox': inbox_id}, properties=['subject']):
+            ...     print(email['subject'])
         """
-        if account_id is None:
-            account_id = self.session.get_account_id()
+        account_id = self._account_id(account_id)
         
         get_args = {
             'accountId': account_id,
-            'ids': ids
+            '#ids': self.result_reference('q1', 'Email/query', '/ids')
         }
-        
         if properties is not None:
             get_args['properties'] = properties
         
-        method_calls = [
-            ['Email/get', get_args, self._next_request_id()]
-        ]
+        anchor = None
+        while True:
+            query_args = _email_query_args(account_id, filter, sort, page_size)
+            if anchor is not None:
+                query_args['anchor'] = anchor
+                query_args['anchorOffset'] = 1
+            
+            results = self.call_batch([
+                ['Email/query', query_args, 'q1'],
+                ['Email/get', get_args, 'g1']
+            ])
+            
+            query = results.get('q1', {})
+            ids = query.get('ids', [])
+            yield from results.get('g1', {}).get('list', [])
+            
+            # A short page is the last one ('limit' is present if the server capped it)
+            if not ids or len(ids) < query.get('limit', page_size):
+                return
+            anchor = ids[-1]
+    
+    def get_emails(
+        self,
+        ids: List[str],
+        properties: Optional[List[str]] = None,
+        account_id: Optional[str] = None,
+        stream: bool = False
+    ) -> Union[List[Dict], Iterator[Dict]]:
+        """
+        Get email objects by IDs.
+        
+        Args:
+            ids: List of email IDs
+            properties: Properties to fetch (fetches all if None)
+            account_id: Account ID (uses primary if not specified)
+            stream: Return an iterator that parses emails while the response
+                downloads, holding one email in memory at a time (uses the
+                optional ijson package; small responses are parsed at once)
+        
+        Returns:
+            List of email objects (iterator if stream=True)
+        """
+        account_id = self._account_id(account_id)
+        
+        get_args = _email_get_args(account_id, ids, properties)
         
-        response = self.make_request(method_calls)
+        if stream:
+            return self._stream_list('Email/get', get_args)
         
-        for method_response in response['methodResponses']:
-            if method_response[0] == 'Email/get':
-                return method_response[1]['list']
+        return self._call('Email/get', get_args).get('list', [])
+    
+    # Responses smaller than this are parsed in one go even when streaming
+    _STREAM_MIN_SIZE = 256 * 1024
+    
+    def _stream_list(self, method: str, arguments: Dict[str, Any]) -> Iterator[Dict]:
+        """Make a single method call and yield the items of its 'list' result"""
+        body = _encode_request([[method, arguments, self._next_request_id()]])
         
-        return []
+        try:
+            with self.session.post_stream(
+                self.session.api_url,
+                body,
+                headers={'Content-Type': 'application/json'}
+            ) as (response, reader):
+                # Content-Length counts compressed bytes, so it only says
+                # how large the JSON is when the body isn't compressed
+                length = response.headers.get('Content-Length')
+                encoding = response.headers.get('Content-Encoding', 'identity')
+                small = (
+                    length is not None and encoding == 'identity'
+                    and int(length) < self._STREAM_MIN_SIZE
+                )
+                
+                if ijson is None or small:
+                    _, results = self._parse_response(reader.read())
+                    for result in results.values():
+                        yield from result.get('list', [])
+                    return
+                
+                try:
+                    yield from _iter_response_list(reader)
+                except ijson.JSONError as e:
+                    raise JMAPServerError(f"Invalid JSON response: {e}")
+        except TRANSPORT_ERRORS as e:
+            raise JMAPNetworkError(f"Request failed: {e}")
     
     def send_email(
         self,
@@ -498,8 +1496,7 @@ class JMAPClient:
         Raises:
             JMAPMethodError: If account is read-only or API key lacks permission
         """
-        if account_id is None:
-            account_id = self.session.get_account_id()
+        account_id = self._account_id(account_id)
         
         # Check if account is read-only
         account_info = self.session.accounts.get(account_id, {})
@@ -515,14 +1512,9 @@ class JMAPClient:
         
         # Get Sent mailbox if not specified (so email appears in Sent after sending)
         if 'mailboxIds' not in email or not email['mailboxIds']:
-            mailboxes = self.get_mailboxes(account_id=account_id)
-            sent_id = None
-            for mb in mailboxes:
-                if mb.get('role') == 'sent':
-                    sent_id = mb['id']
-                    break
-            if sent_id:
-                email['mailboxIds'] = {sent_id: True}
+            sent = self.get_mailboxes(account_id=account_id).by_role.get('sent')
+            if sent:
+                email['mailboxIds'] = {sent['id']: True}
         
         # Transform body format from EmailBodyPart to JMAP bodyValues format
         body_values = {}
@@ -570,81 +1562,47 @@ class JMAPClient:
                         identity_id = identity['id']
                         break
         
-        # Create email draft first
-        create_args = {
-            'accountId': account_id,
-            'create': {
-                'draft': email
-            }
-        }
-        
-        submission_args = {
-            'accountId': account_id,
-            'create': {
-                'submission': {
-                    'emailId': '#draft',
-                    'identityId': identity_id or '$default'
-                }
-            }
-            # Don't destroy email after sending - keep it in Sent folder
-        }
-        
-        method_calls = [
-            ['Email/set', create_args, 'c1'],
-            ['EmailSubmission/set', submission_args, 'c2']
-        ]
+        method_calls = _send_email_calls(account_id, email, identity_id)
         
         # Need to include submission capability in using
-        using = [
-            'urn:ietf:params:jmap:core',
-            'urn:ietf:params:jmap:mail',
-            'urn:ietf:params:jmap:submission'
-        ]
-        
-        response = self.make_request(method_calls, using=using)
-        
-        # Debug: Check if email was created first
-        email_created = False
-        for method_response in response['methodResponses']:
-            if method_response[0] == 'Email/set':
-                result = method_response[1]
-                created = result.get('created') or {}
-                if 'draft' in created:
-                    email_created = True
-                else:
-                    # Email creation failed
-                    not_created = result.get('notCreated') or {}
-                    if not_created and 'draft' in not_created:
-                        error = not_created['draft']
-                        error_type = error.get('type', 'unknown')
-                        description = error.get('description', 'Unknown error')
-                        raise JMAPMethodError(
-                            f"Failed to create email draft: {description}",
-                            error_type=error_type
-                        )
+        results = self.call_batch(method_calls, using=_SUBMISSION_USING)
+        
+        # Check if email was created first
+        email_result = results.get('c1')
+        if email_result is not None:
+            created = email_result.get('created') or {}
+            if 'draft' not in created:
+                # Email creation failed
+                not_created = email_result.get('notCreated') or {}
+                if 'draft' in not_created:
+                    error = not_created['draft']
+                    error_type = error.get('type', 'unknown')
+                    description = error.get('description', 'Unknown error')
+                    raise JMAPMethodError(
+                        f"Failed to create email draft: {description}",
+                        error_type=error_type
+                    )
         
-        # Extract submission result
-        for method_response in response['methodResponses']:
-            if method_response[0] == 'EmailSubmission/set':
-                result = method_response[1]
-                created = result.get('created') or {}
-                if created and 'submission' in created:
-                    return created['submission']
-                
-                # Check for errors
-                not_created = result.get('notCreated') or {}
-                if not_created:
-                    # Extract error details
-                    for ref, error in not_created.items():
-                        error_type = error.get('type', 'unknown')
-                        description = error.get('description', 'Unknown error')
-                        raise JMAPMethodError(
-                            f"Failed to send email: {description}",
-                            error_type=error_type
-                        )
+        # Extract submission result (an implicit Email/set for onSuccess
+        # updates may share the callId; the first response is the submission)
+        submission_result = results.get('c2')
+        if submission_result is not None:
+            created = submission_result.get('created') or {}
+            if 'submission' in created:
+                return created['submission']
+            
+            # Check for errors
+            not_created = submission_result.get('notCreated') or {}
+            for ref, error in not_created.items():
+                error_type = error.get('type', 'unknown')
+                description = error.get('description', 'Unknown error')
+                raise JMAPMethodError(
+                    f"Failed to send email: {description}",
+                    error_type=error_type
+                )
         
         # If we got here, something unexpected happened
         raise JMAPMethodError(
-            f"Email sending failed: No submission created. Response: {response}",
+            f"Email sending failed: No submission created. Response: {results}",
             error_type='unexpectedResponse'
         )
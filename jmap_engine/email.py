@@ -2,12 +2,29 @@
 JMAP Email models and utilities
 """
 
-from typing import List, Dict, Optional, Any
+import sys
+from typing import List, Dict, Optional, Any, Union
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 
 
-@dataclass
+# __slots__ for the per-message classes where dataclasses support it (3.10+)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+FILTER_OPERATORS = ('AND', 'OR', 'NOT')
+
+
+def format_utc_date(value: datetime) -> str:
+    """
+    Format a datetime as a JMAP UTCDate (e.g., '2025-01-31T12:00:00Z').
+    
+    Naive datetimes (e.g. datetime.now()) are interpreted as local time.
+    """
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+@dataclass(**_SLOTS)
 class EmailAddress:
     """Email address with optional name"""
     email: str
@@ -32,7 +49,7 @@ class EmailAddress:
         return self.email
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class EmailBodyPart:
     """Email body part (text or HTML)"""
     type: str  # 'text/plain' or 'text/html'
@@ -47,12 +64,43 @@ class EmailBodyPart:
         }
 
 
-@dataclass
+def _parse_utc_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a JMAP UTCDate/Date string"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _parse_addresses(addresses: Optional[List[Dict]]) -> List[EmailAddress]:
+    """Parse a JMAP EmailAddress list"""
+    if not addresses:
+        return []
+    return [EmailAddress(addr['email'], addr.get('name')) for addr in addresses]
+
+
+def _parse_body_parts(parts: Optional[List[Dict]], default_type: str) -> List[EmailBodyPart]:
+    """Parse a JMAP body part list"""
+    if not parts:
+        return []
+    return [
+        EmailBodyPart(
+            type=part.get('type', default_type),
+            value=part.get('value', ''),
+            charset=part.get('charset', 'utf-8')
+        )
+        for part in parts
+    ]
+
+
+@dataclass(**_SLOTS)
 class Email:
     """
     JMAP Email object.
     
     Represents an email message as defined in RFC 8621.
+    
+    The unread/flagged flags are derived from keywords when the Email is
+    created; call refresh_flags() after changing the keywords.
     """
     
     # Message metadata
@@ -84,6 +132,19 @@ class Email:
     references: List[str] = field(default_factory=list)
     headers: Dict[str, str] = field(default_factory=dict)
     
+    # Keyword flags, derived from keywords
+    _is_unread: bool = field(init=False, repr=False, compare=False)
+    _is_flagged: bool = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        self.refresh_flags()
+    
+    def refresh_flags(self) -> None:
+        """Derive the unread/flagged flags from keywords"""
+        keywords = self.keywords
+        self._is_unread = '$seen' not in keywords
+        self._is_flagged = '$flagged' in keywords
+    
     def to_dict(self) -> Dict:
         """Convert email to JMAP dictionary format"""
         result = {}
@@ -132,61 +193,31 @@ class Email:
     @classmethod
     def from_dict(cls, data: Dict) -> 'Email':
         """Create Email from JMAP dictionary"""
-        # Parse email addresses
-        from_ = [EmailAddress.from_dict(addr) for addr in data.get('from', [])]
-        to = [EmailAddress.from_dict(addr) for addr in data.get('to', [])]
-        cc = [EmailAddress.from_dict(addr) for addr in data.get('cc', [])]
-        bcc = [EmailAddress.from_dict(addr) for addr in data.get('bcc', [])]
-        reply_to = [EmailAddress.from_dict(addr) for addr in data.get('replyTo', [])]
-        
-        # Parse dates
-        received_at = None
-        if 'receivedAt' in data:
-            received_at = datetime.fromisoformat(data['receivedAt'].replace('Z', '+00:00'))
-        
-        sent_at = None
-        if 'sentAt' in data:
-            sent_at = datetime.fromisoformat(data['sentAt'].replace('Z', '+00:00'))
-        
-        # Parse body parts
-        text_body = []
-        for part in data.get('textBody', []):
-            text_body.append(EmailBodyPart(
-                type=part.get('type', 'text/plain'),
-                value=part.get('value', ''),
-                charset=part.get('charset', 'utf-8')
-            ))
-        
-        html_body = []
-        for part in data.get('htmlBody', []):
-            html_body.append(EmailBodyPart(
-                type=part.get('type', 'text/html'),
-                value=part.get('value', ''),
-                charset=part.get('charset', 'utf-8')
-            ))
+        # One lookup per property; JMAP may send null for absent values
+        get = data.get
         
         return cls(
-            id=data.get('id'),
-            blob_id=data.get('blobId'),
-            thread_id=data.get('threadId'),
-            mailbox_ids=data.get('mailboxIds', {}),
-            keywords=data.get('keywords', {}),
-            size=data.get('size'),
-            received_at=received_at,
-            from_=from_,
-            to=to,
-            cc=cc,
-            bcc=bcc,
-            reply_to=reply_to,
-            subject=data.get('subject', ''),
-            sent_at=sent_at,
-            text_body=text_body,
-            html_body=html_body,
-            attachments=data.get('attachments', []),
-            message_id=data.get('messageId'),
-            in_reply_to=data.get('inReplyTo'),
-            references=data.get('references', []),
-            headers=data.get('headers', {})
+            id=get('id'),
+            blob_id=get('blobId'),
+            thread_id=get('threadId'),
+            mailbox_ids=get('mailboxIds') or {},
+            keywords=get('keywords') or {},
+            size=get('size'),
+            received_at=_parse_utc_date(get('receivedAt')),
+            from_=_parse_addresses(get('from')),
+            to=_parse_addresses(get('to')),
+            cc=_parse_addresses(get('cc')),
+            bcc=_parse_addresses(get('bcc')),
+            reply_to=_parse_addresses(get('replyTo')),
+            subject=get('subject') or '',
+            sent_at=_parse_utc_date(get('sentAt')),
+            text_body=_parse_body_parts(get('textBody'), 'text/plain'),
+            html_body=_parse_body_parts(get('htmlBody'), 'text/html'),
+            attachments=get('attachments') or [],
+            message_id=get('messageId'),
+            in_reply_to=get('inReplyTo'),
+            references=get('references') or [],
+            headers=get('headers') or {}
         )
     
     def get_text_content(self) -> str:
@@ -203,11 +234,11 @@ class Email:
     
     def is_unread(self) -> bool:
         """Check if email is unread"""
-        return '$seen' not in self.keywords
+        return self._is_unread
     
     def is_flagged(self) -> bool:
         """Check if email is flagged"""
-        return '$flagged' in self.keywords
+        return self._is_flagged
     
     def is_draft(self) -> bool:
         """Check if email is a draft"""
@@ -236,9 +267,9 @@ class EmailQuery:
         if self.in_mailbox:
             result['inMailbox'] = self.in_mailbox
         if self.after:
-            result['after'] = self.after.isoformat()
+            result['after'] = format_utc_date(self.after)
         if self.before:
-            result['before'] = self.before.isoformat()
+            result['before'] = format_utc_date(self.before)
         if self.has_keyword:
             result['hasKeyword'] = self.has_keyword
         if self.not_keyword:
@@ -259,6 +290,50 @@ class EmailQuery:
         return result
 
 
+def to_jmap_filter(filter: Union[Dict, 'EmailQuery', List, None]) -> Optional[Dict]:
+    """
+    Convert a filter into a JMAP Email/query FilterOperator/FilterCondition.
+    
+    Accepts:
+        - EmailQuery objects
+        - Condition dicts (e.g., {'inMailbox': id, 'notKeyword': '$seen',
+          'after': datetime(2025, 1, 1)}); datetime values become UTCDates
+        - Operator dicts ({'operator': 'OR', 'conditions': [...]}), nested freely
+        - Lists of conditions, combined with AND
+    
+    Filtering this way happens on the server, so only matching IDs are
+    returned instead of filtering fetched emails in Python.
+    
+    Raises:
+        ValueError: On an unknown operator
+    """
+    if filter is None:
+        return None
+    
+    if isinstance(filter, EmailQuery):
+        return filter.to_dict()
+    
+    if isinstance(filter, (list, tuple)):
+        return {
+            'operator': 'AND',
+            'conditions': [to_jmap_filter(condition) for condition in filter]
+        }
+    
+    if 'operator' in filter:
+        operator = filter['operator'].upper()
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator: {filter['operator']}")
+        return {
+            'operator': operator,
+            'conditions': [to_jmap_filter(condition) for condition in filter.get('conditions', [])]
+        }
+    
+    return {
+        key: format_utc_date(value) if isinstance(value, datetime) else value
+        for key, value in filter.items()
+    }
+
+
 @dataclass
 class EmailSubmission:
     """Email submission status"""
@@ -276,9 +351,7 @@ class EmailSubmission:
     @classmethod
     def from_dict(cls, data: Dict) -> 'EmailSubmission':
         """Create EmailSubmission from JMAP dictionary"""
-        send_at = None
-        if 'sendAt' in data:
-            send_at = datetime.fromisoformat(data['sendAt'].replace('Z', '+00:00'))
+        send_at = _parse_utc_date(data.get('sendAt'))
         
         return cls(
             id=data.get('id'),
@@ -35,6 +35,8 @@ class JMAPInvalidRequestError(JMAPError):
 class JMAPMethodError(JMAPError):
     """Method-specific error"""
     
-    def __init__(self, message, error_type=None):
+    def __init__(self, message, error_type=None, session_state=None):
         super().__init__(message)
         self.error_type = error_type
+        # sessionState of the response that carried the error, if known
+        self.session_state = session_state
@@ -2,7 +2,9 @@
 JMAP Mailbox models and utilities
 """
 
-from typing import List, Dict, Optional, Any
+from array import array
+from bisect import bisect_left
+from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass, field
 
 
@@ -34,6 +36,11 @@ class Mailbox:
     # Internal navigation
     _children: List['Mailbox'] = field(default_factory=list, repr=False)
     _parent: Optional['Mailbox'] = field(default=None, repr=False)
+    _cached_envelopes: Optional[List[Dict]] = field(default=None, repr=False)
+    
+    # Subtree counts, precomputed by MailboxTree (None = compute on demand)
+    _total_recursive: Optional[int] = field(default=None, repr=False)
+    _unread_recursive: Optional[int] = field(default=None, repr=False)
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'Mailbox':
@@ -93,6 +100,16 @@ class Mailbox:
         """Get direct children mailboxes"""
         return self._children
     
+    @property
+    def cached_envelopes(self) -> Optional[List[Dict]]:
+        """
+        Prefetched newest email envelopes (None if not prefetched).
+        
+        A snapshot from when they were prefetched; it is not refreshed when
+        emails arrive or change.
+        """
+        return self._cached_envelopes
+    
     @property
     def has_children(self) -> bool:
         """Check if mailbox has children"""
@@ -107,6 +124,8 @@ class Mailbox:
     
     def get_total_emails_recursive(self) -> int:
         """Get total email count including all children"""
+        if self._total_recursive is not None:
+            return self._total_recursive
         total = self.total_emails
         for child in self._children:
             total += child.get_total_emails_recursive()
@@ -114,11 +133,22 @@ class Mailbox:
     
     def get_unread_emails_recursive(self) -> int:
         """Get unread email count including all children"""
+        if self._unread_recursive is not None:
+            return self._unread_recursive
         total = self.unread_emails
         for child in self._children:
             total += child.get_unread_emails_recursive()
         return total
     
+    def _update_recursive_counts(self) -> None:
+        """Recompute subtree counts from own counts and children's subtree counts"""
+        self._total_recursive = self.total_emails + sum(
+            child.get_total_emails_recursive() for child in self._children
+        )
+        self._unread_recursive = self.unread_emails + sum(
+            child.get_unread_emails_recursive() for child in self._children
+        )
+    
     def find_by_name(self, name: str, recursive: bool = False) -> Optional['Mailbox']:
         """Find child mailbox by name"""
         for child in self._children:
@@ -169,6 +199,29 @@ class Mailbox:
         return f"{icon} {self.name} [{self.total_emails} emails{unread_str}]"
 
 
+class MailboxList(list):
+    """
+    List of JMAP mailbox dictionaries with a role index.
+    
+    Behaves exactly like the list returned before; by_role is built on
+    first access with a single pass.
+    """
+    
+    _by_role: Optional[Dict[str, Dict]] = None
+    
+    @property
+    def by_role(self) -> Dict[str, Dict]:
+        """Mailboxes keyed by role (first mailbox wins), e.g. mailboxes.by_role.get('inbox')"""
+        if self._by_role is None:
+            by_role = {}
+            for mailbox in self:
+                role = mailbox.get('role')
+                if role:
+                    by_role.setdefault(role, mailbox)
+            self._by_role = by_role
+        return self._by_role
+
+
 class MailboxTree:
     """
     Mailbox tree structure for easy navigation.
@@ -176,21 +229,32 @@ class MailboxTree:
     Organizes mailboxes into a tree hierarchy.
     """
     
-    def __init__(self, mailboxes: List[Dict]):
+    def __init__(self, mailboxes: List[Dict], state: Optional[str] = None):
         """
         Initialize mailbox tree from JMAP mailbox list.
         
         Args:
             mailboxes: List of mailbox dictionaries from JMAP
+            state: Mailbox/get state string the list was fetched at
         """
+        self.state = state
+        
         # Create Mailbox objects
         self._mailboxes_by_id: Dict[str, Mailbox] = {}
         self._root_mailboxes: List[Mailbox] = []
         
+        # Lookup indices (first mailbox wins when names/roles repeat)
+        self._mailboxes_by_name: Dict[str, Mailbox] = {}
+        self._mailboxes_by_role: Dict[str, Mailbox] = {}
+        self._mailboxes_by_path: Dict[Tuple[str, ...], Mailbox] = {}
+        
         # First pass: create all mailbox objects
         for mb_data in mailboxes:
             mailbox = Mailbox.from_dict(mb_data)
             self._mailboxes_by_id[mailbox.id] = mailbox
+            self._mailboxes_by_name.setdefault(mailbox.name, mailbox)
+            if mailbox.role:
+                self._mailboxes_by_role.setdefault(mailbox.role, mailbox)
         
         # Second pass: build tree structure
         for mailbox in self._mailboxes_by_id.values():
@@ -211,6 +275,42 @@ class MailboxTree:
         
         # Sort roots
         self._root_mailboxes.sort(key=lambda m: (m.sort_order, m.name))
+        
+        # Index paths in display order, as tuples of names
+        stack = [((root.name,), root) for root in reversed(self._root_mailboxes)]
+        visit_order = []
+        while stack:
+            path, mailbox = stack.pop()
+            self._mailboxes_by_path.setdefault(path, mailbox)
+            visit_order.append(mailbox)
+            for child in reversed(mailbox._children):
+                stack.append((path + (child.name,), child))
+        
+        # Case-insensitive name index for prefix search (sorted for bisect)
+        name_index = sorted(
+            (mailbox.name.lower(), mailbox.name, i, mailbox)
+            for i, mailbox in enumerate(visit_order)
+        )
+        self._sorted_names: List[str] = [entry[0] for entry in name_index]
+        self._sorted_mailboxes: List[Mailbox] = [entry[3] for entry in name_index]
+        
+        # Subtree counts in one bottom-up pass (children before parents)
+        for mailbox in reversed(visit_order):
+            mailbox._update_recursive_counts()
+        
+        # Per-mailbox numbers as flat arrays (parents precede children),
+        # so statistics are C-level reductions instead of object walks
+        self._index_by_id: Dict[str, int] = {}
+        self._total_emails_arr = array('q')
+        self._unread_emails_arr = array('q')
+        self._depth_arr = array('q')
+        
+        for i, mailbox in enumerate(visit_order):
+            self._index_by_id[mailbox.id] = i
+            parent_idx = self._index_by_id[mailbox._parent.id] if mailbox._parent else -1
+            self._total_emails_arr.append(mailbox.total_emails)
+            self._unread_emails_arr.append(mailbox.unread_emails)
+            self._depth_arr.append(self._depth_arr[parent_idx] + 1 if parent_idx >= 0 else 0)
     
     @property
     def roots(self) -> List[Mailbox]:
@@ -223,17 +323,11 @@ class MailboxTree:
     
     def get_by_name(self, name: str) -> Optional[Mailbox]:
         """Get mailbox by name (searches all mailboxes)"""
-        for mailbox in self._mailboxes_by_id.values():
-            if mailbox.name == name:
-                return mailbox
-        return None
+        return self._mailboxes_by_name.get(name)
     
     def get_by_role(self, role: str) -> Optional[Mailbox]:
         """Get mailbox by role (inbox, sent, trash, etc.)"""
-        for mailbox in self._mailboxes_by_id.values():
-            if mailbox.role == role:
-                return mailbox
-        return None
+        return self._mailboxes_by_role.get(role)
     
     def find_by_path(self, path: str, separator: str = '/') -> Optional[Mailbox]:
         """
@@ -246,25 +340,94 @@ class MailboxTree:
         Returns:
             Mailbox if found, None otherwise
         """
-        parts = path.split(separator)
-        current = None
+        return self._mailboxes_by_path.get(tuple(path.split(separator)))
+    
+    def find_by_prefix(self, prefix: str) -> List[Mailbox]:
+        """
+        Find mailboxes whose name starts with prefix (case-insensitive).
         
-        # Find root
-        for root in self._root_mailboxes:
-            if root.name == parts[0]:
-                current = root
+        Args:
+            prefix: Name prefix, e.g. 'arch' for 'Archive'
+        
+        Returns:
+            Matching mailboxes ordered by name
+        """
+        prefix = prefix.lower()
+        start = bisect_left(self._sorted_names, prefix)
+        
+        matches = []
+        for i in range(start, len(self._sorted_names)):
+            if not self._sorted_names[i].startswith(prefix):
                 break
+            matches.append(self._sorted_mailboxes[i])
+        return matches
+    
+    def update_counts(self, mailboxes: List[Dict]) -> None:
+        """
+        Apply updated mailbox counts (e.g. from Mailbox/changes + Mailbox/get).
         
-        if not current:
-            return None
+        Only the changed mailboxes and their ancestors have their subtree
+        counts recomputed.
         
-        # Navigate down
-        for part in parts[1:]:
-            current = current.find_by_name(part, recursive=False)
-            if not current:
-                return None
+        Args:
+            mailboxes: Mailbox dictionaries with 'id' and any of the count properties
+        """
+        fields = {
+            'totalEmails': 'total_emails',
+            'unreadEmails': 'unread_emails',
+            'totalThreads': 'total_threads',
+            'unreadThreads': 'unread_threads'
+        }
         
-        return current
+        dirty = {}
+        for mb_data in mailboxes:
+            mailbox = self._mailboxes_by_id.get(mb_data.get('id'))
+            if not mailbox:
+                continue
+            for key, attr in fields.items():
+                if key in mb_data:
+                    setattr(mailbox, attr, mb_data[key])
+            
+            idx = self._index_by_id.get(mailbox.id)
+            if idx is not None:
+                self._total_emails_arr[idx] = mailbox.total_emails
+                self._unread_emails_arr[idx] = mailbox.unread_emails
+            
+            # Mark the mailbox and its ancestors
+            while mailbox and mailbox.id not in dirty:
+                dirty[mailbox.id] = mailbox
+                mailbox = mailbox._parent
+        
+        # Deepest first, so children are up to date before their parents
+        for mailbox in sorted(dirty.values(), key=lambda m: m.depth, reverse=True):
+            mailbox._update_recursive_counts()
+    
+    def set_cached_envelopes(self, mailbox_id: str, emails: List[Dict]) -> None:
+        """
+        Cache prefetched envelopes for a mailbox.
+        
+        The envelopes are a snapshot: nothing refreshes them when emails
+        arrive or change. Prefetch again (or call invalidate_envelopes())
+        to drop outdated ones.
+        """
+        mailbox = self._mailboxes_by_id.get(mailbox_id)
+        if mailbox:
+            mailbox._cached_envelopes = emails
+    
+    def get_cached_envelopes(self, mailbox_id: str) -> Optional[List[Dict]]:
+        """Get prefetched envelopes for a mailbox, or None if not prefetched"""
+        mailbox = self._mailboxes_by_id.get(mailbox_id)
+        return mailbox.cached_envelopes if mailbox else None
+    
+    def invalidate_envelopes(self, mailbox_id: Optional[str] = None) -> None:
+        """Drop prefetched envelopes for one mailbox (or all if None)"""
+        if mailbox_id is None:
+            mailboxes = self._mailboxes_by_id.values()
+        else:
+            mailboxes = [self._mailboxes_by_id.get(mailbox_id)]
+        for mailbox in mailboxes:
+            if mailbox:
+                mailbox._cached_envelopes = None
     
     def get_all_mailboxes(self) -> List[Mailbox]:
         """Get all mailboxes as flat list"""
@@ -320,17 +483,10 @@ class MailboxTree:
     
     def get_statistics(self) -> Dict[str, int]:
         """Get overall statistics"""
-        stats = {
+        return {
             'total_mailboxes': len(self._mailboxes_by_id),
             'root_mailboxes': len(self._root_mailboxes),
-            'total_emails': 0,
-            'unread_emails': 0,
-            'deepest_level': 0
+            'total_emails': sum(self._total_emails_arr),
+            'unread_emails': sum(self._unread_emails_arr),
+            'deepest_level': max(self._depth_arr, default=0)
         }
-        
-        for mailbox in self._mailboxes_by_id.values():
-            stats['total_emails'] += mailbox.total_emails
-            stats['unread_emails'] += mailbox.unread_emails
-            stats['deepest_level'] = max(stats['deepest_level'], mailbox.depth)
-        
-        return stats
@@ -2,10 +2,125 @@
 JMAP Session management
 """
 
+import base64
+import re
 import requests
-from typing import Dict, Optional
+import urllib3
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterator, Optional
+from urllib.parse import urljoin
+from urllib3.util.request import ACCEPT_ENCODING as _URLLIB3_ENCODINGS
+from urllib3.util.retry import Retry
+from . import _json
 from .exceptions import JMAPAuthError, JMAPNetworkError
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401 - required by httpx for HTTP/2
+except ImportError:
+    h2 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Exceptions raised by either HTTP transport (urllib3 errors can surface
+# while reading a streamed requests body)
+TRANSPORT_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError)
+if httpx is not None:
+    TRANSPORT_ERRORS += (httpx.HTTPError,)
+
+HTTP2_AVAILABLE = httpx is not None and h2 is not None
+
+
+def request_not_processed(error: Exception) -> bool:
+    """
+    Check whether a transport error proves the server never ran the request.
+    
+    True for failures to connect and for 404 (an outdated API URL). Timeouts
+    and other errors may come after the server processed the method calls,
+    so a request failing with them must not be resent.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        # Also raised when the connection drops after the body was sent
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, urllib3.exceptions.NewConnectionError)
+    if httpx is not None and isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None) == 404
+
+# Upper bound on open connections for the HTTP/2 client. HTTP/2 multiplexes
+# requests over one connection per host, so this only caps pathological fan-out.
+HTTP2_MAX_CONNECTIONS = 64
+
+# Response compressions in order of preference (best ratio/speed first)
+_PREFERRED_ENCODINGS = ('zstd', 'br', 'gzip', 'deflate')
+
+
+def _accept_encoding(supported) -> str:
+    """Build an Accept-Encoding value from the codings a transport can decode"""
+    supported = {encoding.strip() for encoding in supported}
+    return ', '.join(e for e in _PREFERRED_ENCODINGS if e in supported)
+
+
+# What each transport can decode depends on the optional brotli/zstandard
+# packages (pip install "jmap-engine[compression]")
+REQUESTS_ACCEPT_ENCODING = _accept_encoding(_URLLIB3_ENCODINGS.split(','))
+if httpx is not None:
+    try:
+        from httpx._decoders import SUPPORTED_DECODERS as _HTTPX_DECODERS
+    except ImportError:  # pragma: no cover - private module moved
+        _HTTPX_DECODERS = ('gzip', 'deflate')
+    HTTPX_ACCEPT_ENCODING = _accept_encoding(_HTTPX_DECODERS)
+else:
+    HTTPX_ACCEPT_ENCODING = None
+
+# Request bodies up to this size are sent uncompressed: compressing them
+# costs more CPU than the few saved bytes are worth
+COMPRESS_MIN_SIZE = 16384
+COMPRESS_LEVEL = 3
+
+# Fastmail API tokens look like 'fmu1-...' (older ones 'fmu-...')
+_BEARER_TOKEN_RE = re.compile(r'fmu\d*-')
+
+
+class _IteratorReader:
+    """File-like read() over an iterator of byte chunks"""
+    
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        # bytearray: appending and trimming the front don't copy the whole buffer
+        self._buffer = bytearray()
+    
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            # Join everything at once instead of growing a buffer chunk by chunk
+            data = b''.join([bytes(self._buffer), *self._chunks])
+            self._buffer.clear()
+            return data
+        
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        
+        with memoryview(self._buffer) as view:
+            data = bytes(view[:size])
+        del self._buffer[:size]
+        return data
+
 
 class JMAPSession:
     """
@@ -20,13 +135,29 @@ class JMAPSession:
         username: str,
         password: str,
         timeout: int = 30,
-        use_bearer_token: bool = False
+        use_bearer_token: bool = False,
+        http2: bool = True,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        retries: int = 3,
+        compress_requests: bool = False
     ):
         self.base_url = base_url.rstrip('/')
         self.username = username
         self.password = password
         self.timeout = timeout
         self.use_bearer_token = use_bearer_token
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        
+        # zstd request bodies need server support, which JMAP sessions do not
+        # advertise, so they are opt-in (and need the zstandard package)
+        if compress_requests and zstandard is None:
+            raise ImportError(
+                "compress_requests requires zstandard: pip install \"jmap-engine[compression]\""
+            )
+        self.compress_requests = compress_requests
         
         # Session data
         self.api_url: Optional[str] = None
@@ -37,25 +168,85 @@ class JMAPSession:
         self.accounts: Dict = {}
         self.primary_accounts: Dict = {}
         self.state: Optional[str] = None
+        self.session_data: Dict = {}
+        
+        # Resolved account ID per capability (reset when the session reloads)
+        self._account_ids: Dict[str, str] = {}
         
-        # HTTP session
-        self.session = requests.Session()
+        # RFC 8620 session resource, resolved once
+        self.well_known_url = urljoin(f"{self.base_url}/", '.well-known/jmap')
         
-        # Auto-detect Bearer token (Fastmail API keys start with 'fmu')
-        if use_bearer_token or (password and password.startswith('fmu')):
+        # Negotiated protocol, e.g. 'HTTP/2' (known after the first request)
+        self.http_version: Optional[str] = None
+        
+        # Authorization is decided once here and sent as a ready-made header,
+        # so no request re-checks the credentials or re-encodes them
+        self._auth_header = self._build_auth_header()
+        self._base_headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            **self._auth_header
+        }
+        
+        # HTTP session: HTTP/2 via httpx when installed, requests otherwise
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.session = self._create_http_session()
+    
+    def _build_auth_header(self) -> Dict[str, str]:
+        """Build the Authorization header for the configured credentials"""
+        # Auto-detect Bearer token (Fastmail API keys start with 'fmu1-')
+        self._is_bearer = self.use_bearer_token or bool(
+            self.password and _BEARER_TOKEN_RE.match(self.password)
+        )
+        if self._is_bearer:
             # Use Bearer token authentication (Fastmail API keys)
-            self.session.headers.update({
-                'Authorization': f'Bearer {password}',
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            })
-        else:
-            # Use Basic authentication (username/password or app password)
-            self.session.auth = (self.username, self.password)
-            self.session.headers.update({
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            })
+            return {'Authorization': f'Bearer {self.password}'}
+        
+        # Use Basic authentication (username/password or app password)
+        credentials = f'{self.username}:{self.password}'.encode('utf-8')
+        return {'Authorization': f"Basic {base64.b64encode(credentials).decode('ascii')}"}
+    
+    def _create_http_session(self):
+        """Create the underlying HTTP client"""
+        if self.http2:
+            # One multiplexed connection carries concurrent requests.
+            # httpx only retries failed connection attempts, which is safe for POST.
+            transport = httpx.HTTPTransport(
+                http2=True,
+                retries=self.retries,
+                limits=httpx.Limits(
+                    max_connections=HTTP2_MAX_CONNECTIONS,
+                    max_keepalive_connections=min(self.pool_maxsize, HTTP2_MAX_CONNECTIONS)
+                )
+            )
+            return httpx.Client(
+                transport=transport,
+                headers={**self._base_headers, 'Accept-Encoding': HTTPX_ACCEPT_ENCODING},
+                timeout=self.timeout,
+                follow_redirects=True
+            )
+        
+        # Keep warm connections around so requests skip the TCP/TLS handshake.
+        # Retry's default allowed_methods exclude POST, so JMAP method calls
+        # (which may not be idempotent) are only retried on connection errors.
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504]
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry
+        )
+        
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(self._base_headers)
+        session.headers['Accept-Encoding'] = REQUESTS_ACCEPT_ENCODING
+        session.headers['Connection'] = 'keep-alive'
+        return session
     
     def discover_session(self) -> None:
         """
@@ -64,19 +255,26 @@ class JMAPSession:
         Fetches the session object from /.well-known/jmap
         as specified in RFC 8620 Section 2.2.
         """
-        well_known_url = f"{self.base_url}/.well-known/jmap"
-        
         try:
-            response = self.session.get(well_known_url, timeout=self.timeout)
+            response = self.session.get(self.well_known_url, timeout=self.timeout)
             response.raise_for_status()
-        except requests.exceptions.RequestException as e:
+        except TRANSPORT_ERRORS as e:
             raise JMAPNetworkError(f"Failed to discover JMAP session: {e}")
         
+        self._record_http_version(response)
+        
         try:
-            session_data = response.json()
+            session_data = _json.loads(response.content)
         except ValueError as e:
             raise JMAPAuthError(f"Invalid JSON response: {e}")
         
+        self._load_session_data(session_data)
+    
+    def _load_session_data(self, session_data: Dict) -> None:
+        """Populate session attributes from a JMAP Session object"""
+        self.session_data = session_data
+        self._account_ids = {}
+        
         # Extract session information
         self.api_url = session_data.get('apiUrl')
         self.download_url = session_data.get('downloadUrl')
@@ -90,14 +288,93 @@ class JMAPSession:
         if not self.api_url:
             raise JMAPAuthError("No API URL in session response")
     
+    def _compress_body(self, body: bytes, headers: Optional[Dict[str, str]]):
+        """
+        Compress a large request body with zstd if request compression is on.
+        
+        Returns:
+            (body, headers) tuple; headers gain Content-Encoding when compressed
+        """
+        if not self.compress_requests or len(body) <= COMPRESS_MIN_SIZE:
+            return body, headers
+        
+        # Compressors are not thread-safe, so each request gets its own
+        body = zstandard.ZstdCompressor(level=COMPRESS_LEVEL).compress(body)
+        return body, {**(headers or {}), 'Content-Encoding': 'zstd'}
+    
+    def post(self, url: str, body: bytes, headers: Optional[Dict[str, str]] = None):
+        """
+        POST a pre-encoded request body with the active transport.
+        
+        Raises the transport's own exceptions (see TRANSPORT_ERRORS).
+        """
+        body, headers = self._compress_body(body, headers)
+        if self.http2:
+            response = self.session.post(url, content=body, headers=headers, timeout=self.timeout)
+        else:
+            response = self.session.post(url, data=body, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        self._record_http_version(response)
+        return response
+    
+    @contextmanager
+    def post_stream(self, url: str, body: bytes, headers: Optional[Dict[str, str]] = None):
+        """
+        POST a request and stream the response body.
+        
+        Yields (response, reader) where reader is a file-like object with
+        read(); the connection is released when the block exits.
+        
+        Raises the transport's own exceptions (see TRANSPORT_ERRORS).
+        """
+        body, headers = self._compress_body(body, headers)
+        if self.http2:
+            with self.session.stream('POST', url, content=body, headers=headers,
+                                     timeout=self.timeout) as response:
+                response.raise_for_status()
+                self._record_http_version(response)
+                yield response, _IteratorReader(response.iter_bytes())
+            return
+        
+        response = self.session.post(url, data=body, headers=headers,
+                                     timeout=self.timeout, stream=True)
+        try:
+            response.raise_for_status()
+            self._record_http_version(response)
+            # Undo Content-Encoding (gzip etc.) while reading the raw stream
+            response.raw.decode_content = True
+            yield response, response.raw
+        finally:
+            response.close()
+    
+    def _record_http_version(self, response) -> None:
+        """Remember the HTTP version negotiated for a response"""
+        http_version = getattr(response, 'http_version', None)
+        if isinstance(http_version, str):
+            # httpx reports the protocol directly
+            self.http_version = http_version
+        else:
+            raw = getattr(response, 'raw', None)
+            version = getattr(raw, 'version', None)
+            if version == 11:
+                self.http_version = 'HTTP/1.1'
+            elif version == 10:
+                self.http_version = 'HTTP/1.0'
+    
     def get_account_id(self, capability: str = 'urn:ietf:params:jmap:mail') -> str:
         """Get the primary account ID for a given capability"""
+        account_id = self._account_ids.get(capability)
+        if account_id is not None:
+            return account_id
+        
         account_id = self.primary_accounts.get(capability)
         if not account_id and self.accounts:
             # Fall back to first account
-            account_id = list(self.accounts.keys())[0]
+            account_id = next(iter(self.accounts))
         if not account_id:
             raise JMAPAuthError(f"No account found for capability: {capability}")
+        
+        self._account_ids[capability] = account_id
         return account_id
     
     def has_capability(self, capability: str) -> bool:
@@ -49,6 +49,29 @@ setup(
         'requests>=2.25.0',
     ],
     extras_require={
+        'fast': [
+            'orjson>=3.9,<4',
+        ],
+        'msgspec': [
+            'msgspec>=0.18',
+        ],
+        'cache': [
+            'platformdirs>=2.0',
+        ],
+        'stream': [
+            'ijson>=3.1',
+        ],
+        'simd': [
+            'pysimdjson>=5.0',
+        ],
+        'compression': [
+            'brotli>=1.0',
+            'zstandard>=0.18',
+        ],
+        'http2': [
+            'httpx[http2]>=0.24',
+            'h2>=4.0.0',
+        ],
         'dev': [
             'pytest>=6.0',
             'pytest-cov>=2.0',
@@ -0,0 +1,132 @@
+"""
+Tests for AsyncJMAPClient
+"""
+
+import asyncio
+import json
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from jmap_engine import AsyncJMAPClient
+
+
+SESSION = {
+    'apiUrl': 'https://example.com/api/',
+    'capabilities': {'urn:ietf:params:jmap:core': {}, 'urn:ietf:params:jmap:mail': {}},
+    'accounts': {'u1': {'name': 'test@example.com'}},
+    'primaryAccounts': {'urn:ietf:params:jmap:mail': 'u1'},
+    'state': 's1'
+}
+
+
+def make_client(handler):
+    """Create an async client whose HTTP layer is served by handler"""
+    client = AsyncJMAPClient('https://example.com', 'user', 'pass')
+    client.session.session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def api_handler(request):
+    """Answer session discovery and echo one response per method call"""
+    if request.method == 'GET':
+        return httpx.Response(200, json=SESSION)
+    
+    body = json.loads(request.content)
+    responses = []
+    for name, args, call_id in body['methodCalls']:
+        if name == 'Mailbox/get':
+            result = {'list': [
+                {'id': 'mb1', 'name': 'Inbox', 'role': 'inbox'},
+                {'id': 'mb2', 'name': 'Sub', 'parentId': 'mb1'}
+            ]}
+        elif name == 'Email/query':
+            result = {'ids': [f"{args['filter']['inMailbox']}-e1"]}
+        else:
+            result = {'list': [{'id': i} for i in args['ids']]}
+        responses.append([name, result, call_id])
+    return httpx.Response(200, json={'methodResponses': responses})
+
+
+def test_async_mailbox_tree():
+    """Test session discovery and mailbox tree over the async client"""
+    async def run():
+        async with make_client(api_handler) as client:
+            return await client.get_mailbox_tree()
+    
+    tree = asyncio.run(run())
+    assert tree.get_by_role('inbox').id == 'mb1'
+    assert tree.get_by_id('mb2')._parent is tree.get_by_id('mb1')
+
+
+def test_async_concurrent_queries():
+    """Test independent queries can be gathered concurrently"""
+    async def run():
+        async with make_client(api_handler) as client:
+            return await asyncio.gather(*[
+                client.query_emails(filter={'inMailbox': mailbox_id})
+                for mailbox_id in ('mb1', 'mb2')
+            ])
+    
+    assert asyncio.run(run()) == [['mb1-e1'], ['mb2-e1']]
+
+
+def test_async_get_emails_bulk():
+    """Test bulk fetches are chunked by maxObjectsInGet and keep ID order"""
+    sizes = []
+    
+    def handler(request):
+        if request.method == 'POST':
+            sizes.append(len(json.loads(request.content)['methodCalls'][0][1]['ids']))
+        return api_handler(request)
+    
+    async def run():
+        async with make_client(handler) as client:
+            client.session.capabilities['urn:ietf:params:jmap:core'] = {'maxObjectsInGet': 4}
+            return await client.get_emails_bulk([f'e{i}' for i in range(10)])
+    
+    emails = asyncio.run(run())
+    assert [email['id'] for email in emails] == [f'e{i}' for i in range(10)]
+    assert sorted(sizes) == [2, 4, 4]
+
+
+def test_async_get_emails_bulk_reorders_results():
+    """Test bulk results follow the requested ID order whatever order the server uses"""
+    def handler(request):
+        if request.method == 'GET':
+            return httpx.Response(200, json=SESSION)
+        
+        _, args, call_id = json.loads(request.content)['methodCalls'][0]
+        ids = args['ids']
+        found = [{'id': email_id} for email_id in reversed(ids) if email_id != 'e3']
+        return httpx.Response(200, json={
+            'methodResponses': [['Email/get', {'list': found, 'notFound': ['e3']}, call_id]],
+            'sessionState': 's1'
+        })
+    
+    async def run():
+        async with make_client(handler) as client:
+            client.session.capabilities['urn:ietf:params:jmap:core'] = {'maxObjectsInGet': 3}
+            return await client.get_emails_bulk([f'e{i}' for i in range(7)])
+    
+    emails = asyncio.run(run())
+    assert [email['id'] for email in emails] == ['e0', 'e1', 'e2', 'e4', 'e5', 'e6']
+
+
+def test_async_retry_after_rate_limit():
+    """Test 429 responses are retried after the server's Retry-After"""
+    attempts = []
+    
+    def handler(request):
+        if request.method == 'POST':
+            attempts.append(request)
+            if len(attempts) == 1:
+                return httpx.Response(429, headers={'Retry-After': '0'})
+        return api_handler(request)
+    
+    async def run():
+        async with make_client(handler) as client:
+            return await client.get_emails(['e1'])
+    
+    assert asyncio.run(run()) == [{'id': 'e1'}]
+    assert len(attempts) == 2
@@ -0,0 +1,26 @@
+"""
+Tests for StateCache
+"""
+
+from jmap_engine.cache import StateCache
+
+
+def test_memory_cache():
+    """Test in-memory entries"""
+    cache = StateCache()
+    assert cache.get('u1', 'Mailbox/get') is None
+    
+    cache.set('u1', 'Mailbox/get', 's1', [{'id': 'mb1'}])
+    assert cache.get('u1', 'Mailbox/get') == ('s1', [{'id': 'mb1'}])
+    
+    cache.delete('u1', 'Mailbox/get')
+    assert cache.get('u1', 'Mailbox/get') is None
+
+
+def test_disk_cache(tmp_path):
+    """Test entries persist across cache instances"""
+    StateCache(str(tmp_path)).set('u1', 'Mailbox/get', 's1', [{'id': 'mb1'}])
+    
+    cache = StateCache(str(tmp_path))
+    assert cache.get('u1', 'Mailbox/get') == ('s1', [{'id': 'mb1'}])
+    assert cache.get('u2', 'Mailbox/get') is None
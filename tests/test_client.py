@@ -0,0 +1,635 @@
+"""
+Tests for JMAPClient request handling
+"""
+
+import json
+import pytest
+from unittest.mock import MagicMock
+from jmap_engine import JMAPClient, JMAPServerError, StateCache
+from jmap_engine import client as client_module
+from jmap_engine.exceptions import JMAPInvalidRequestError, JMAPMethodError, JMAPNetworkError
+
+
+def make_client(responses, **kwargs):
+    """Create a client whose HTTP layer returns the given JSON payloads in order"""
+    client = JMAPClient('https://example.com', 'user', 'pass', http2=False, **kwargs)
+    client.session.api_url = 'https://example.com/api/'
+    client.session.primary_accounts = {'urn:ietf:params:jmap:mail': 'u1'}
+    
+    http_responses = []
+    for payload in responses:
+        response = MagicMock()
+        response.content = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        http_responses.append(response)
+    
+    client.session.session.post = MagicMock(side_effect=http_responses)
+    return client
+
+
+def sent_body(client, call=-1):
+    """Decode the JSON body of a request sent by the client"""
+    return json.loads(client.session.session.post.call_args_list[call].kwargs['data'])
+
+
+def test_make_request_encodes_body():
+    """Test request body is sent as JSON bytes"""
+    client = make_client([{'methodResponses': []}])
+    
+    client.make_request([['Mailbox/get', {'accountId': 'u1'}, 'a']])
+    
+    kwargs = client.session.session.post.call_args.kwargs
+    assert isinstance(kwargs['data'], bytes)
+    assert kwargs['headers']['Content-Type'] == 'application/json'
+    assert sent_body(client) == {
+        'using': ['urn:ietf:params:jmap:core', 'urn:ietf:params:jmap:mail'],
+        'methodCalls': [['Mailbox/get', {'accountId': 'u1'}, 'a']]
+    }
+
+
+def test_make_request_custom_using():
+    """Test an explicit capability list replaces the default one"""
+    client = make_client([{'methodResponses': []}])
+    
+    client.make_request([['Identity/get', {}, 'a']], using=['urn:ietf:params:jmap:submission'])
+    
+    assert sent_body(client)['using'] == ['urn:ietf:params:jmap:submission']
+
+
+@pytest.mark.parametrize('payload', [b'not json', b'\xff\xfe', b'[1, 2]'])
+def test_make_request_invalid_json(payload):
+    """Test invalid JSON responses raise JMAPServerError"""
+    client = make_client([payload])
+    
+    with pytest.raises(JMAPServerError):
+        client.make_request([['Mailbox/get', {'accountId': 'u1'}, 'a']])
+
+
+def test_call_batch_single_request():
+    """Test dependent calls are sent in one request and keyed by callId"""
+    client = make_client([{
+        'methodResponses': [
+            ['Email/query', {'ids': ['e1', 'e2']}, 'q'],
+            ['Email/get', {'list': [{'id': 'e1'}, {'id': 'e2'}]}, 'g']
+        ]
+    }])
+    
+    results = client.call_batch([
+        ['Email/query', {'accountId': 'u1'}, 'q'],
+        ['Email/get', {'accountId': 'u1', '#ids': client.result_reference('q', 'Email/query', '/ids')}, 'g']
+    ])
+    
+    assert client.session.session.post.call_count == 1
+    assert results['q']['ids'] == ['e1', 'e2']
+    assert len(results['g']['list']) == 2
+
+
+def test_call_batch_orders_references():
+    """Test referenced calls are moved before the calls that use them"""
+    client = make_client([{'methodResponses': []}])
+    
+    client.call_batch([
+        ['Email/get', {'#ids': client.result_reference('q', 'Email/query', '/ids')}, 'g'],
+        ['Email/query', {'accountId': 'u1'}, 'q']
+    ])
+    
+    call_ids = [call[2] for call in sent_body(client)['methodCalls']]
+    assert call_ids == ['q', 'g']
+
+
+def test_query_and_get_emails():
+    """Test query and fetch are chained in one request"""
+    client = make_client([{
+        'methodResponses': [
+            ['Email/query', {'ids': ['e1']}, 'q1'],
+            ['Email/get', {'list': [{'id': 'e1', 'subject': 'Hi'}]}, 'g1']
+        ]
+    }])
+    
+    emails = client.query_and_get_emails(filter={'inMailbox': 'm1'}, limit=5, properties=['subject'])
+    
+    assert emails == [{'id': 'e1', 'subject': 'Hi'}]
+    calls = sent_body(client)['methodCalls']
+    assert calls[0] == ['Email/query', {'accountId': 'u1', 'filter': {'inMailbox': 'm1'}, 'limit': 5}, 'q1']
+    assert calls[1][1]['#ids'] == {'resultOf': 'q1', 'name': 'Email/query', 'path': '/ids'}
+    assert calls[1][1]['properties'] == ['subject']
+
+
+def test_call_batch_unknown_reference():
+    """Test references to calls outside the batch are rejected"""
+    client = make_client([])
+    
+    with pytest.raises(JMAPInvalidRequestError):
+        client.call_batch([
+            ['Email/get', {'#ids': client.result_reference('missing', 'Email/query', '/ids')}, 'g']
+        ])
+
+
+def test_single_call_helpers():
+    """Test single-call helpers return their response arguments"""
+    client = make_client([
+        {'methodResponses': [['Mailbox/get', {'list': [{'id': 'mb1'}]}, 'req1']]},
+        {'methodResponses': [['Email/query', {'ids': ['e1']}, 'req2']]}
+    ])
+    
+    assert client.get_mailboxes() == [{'id': 'mb1'}]
+    assert client.query_emails(filter={'inMailbox': 'mb1'}) == ['e1']
+
+
+def test_connection_pool():
+    """Test the requests transport keeps a retrying connection pool"""
+    client = JMAPClient('https://example.com', 'user', 'pass', http2=False, pool_maxsize=5, retries=2)
+    
+    adapter = client.session.session.get_adapter('https://example.com/api/')
+    assert adapter._pool_maxsize == 5
+    assert adapter.max_retries.total == 2
+    assert 'POST' not in adapter.max_retries.allowed_methods
+
+
+def test_auth_header_built_once():
+    """Test credentials become a session-level Authorization header"""
+    basic = JMAPClient('https://example.com', 'user', 'pass', http2=False)
+    bearer = JMAPClient('https://example.com', 'user', 'fmu1-token', http2=False)
+    
+    assert basic.session.session.headers['Authorization'] == 'Basic dXNlcjpwYXNz'
+    assert basic.session.session.auth is None
+    assert bearer.session.session.headers['Authorization'] == 'Bearer fmu1-token'
+    
+    # Only the Fastmail token format is detected, not any password starting with 'fmu'
+    assert JMAPClient('https://example.com', 'user', 'fmu-token', http2=False).session._is_bearer
+    assert not JMAPClient('https://example.com', 'user', 'fmuffin', http2=False).session._is_bearer
+
+
+def test_accept_encoding_prefers_best_compression():
+    """Test Accept-Encoding lists only decodable codings, best first"""
+    from jmap_engine.session import _accept_encoding
+    
+    assert _accept_encoding(['gzip', 'deflate', 'br', 'zstd', 'identity']) == 'zstd, br, gzip, deflate'
+    assert _accept_encoding('gzip,deflate'.split(',')) == 'gzip, deflate'
+    
+    client = JMAPClient('https://example.com', 'user', 'pass', http2=False)
+    assert 'gzip' in client.session.session.headers['Accept-Encoding']
+
+
+def test_request_compression():
+    """Test large request bodies are zstd-compressed when enabled"""
+    zstandard = pytest.importorskip('zstandard')
+    client = make_client([{'methodResponses': []}] * 2, compress_requests=True)
+    
+    client.make_request([['Mailbox/get', {'accountId': 'u1'}, 'a']])
+    assert 'Content-Encoding' not in client.session.session.post.call_args.kwargs['headers']
+    
+    draft = {'subject': 'x' * 20000}
+    client.make_request([['Email/set', {'accountId': 'u1', 'create': {'draft': draft}}, 'a']])
+    kwargs = client.session.session.post.call_args.kwargs
+    assert kwargs['headers']['Content-Encoding'] == 'zstd'
+    body = json.loads(zstandard.ZstdDecompressor().decompress(kwargs['data']))
+    assert body['methodCalls'][0][1]['create']['draft'] == draft
+
+
+def test_request_compression_requires_zstandard(monkeypatch):
+    """Test asking for request compression without zstandard fails loudly"""
+    from jmap_engine import session as session_module
+    monkeypatch.setattr(session_module, 'zstandard', None)
+    
+    with pytest.raises(ImportError):
+        JMAPClient('https://example.com', 'user', 'pass', http2=False, compress_requests=True)
+    
+    # Off by default, so a base install is unaffected
+    assert not JMAPClient('https://example.com', 'user', 'pass', http2=False).session.compress_requests
+
+
+def test_well_known_url():
+    """Test the session URL is resolved against the base URL once"""
+    assert JMAPClient('https://example.com/', 'u', 'p', http2=False).session.well_known_url == \
+        'https://example.com/.well-known/jmap'
+    assert JMAPClient('https://example.com/jmap', 'u', 'p', http2=False).session.well_known_url == \
+        'https://example.com/jmap/.well-known/jmap'
+
+
+def test_http2_transport():
+    """Test requests go through httpx when HTTP/2 support is installed"""
+    httpx = pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    
+    seen = []
+    
+    def handler(request):
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, json={'methodResponses': [['Mailbox/get', {'list': []}, 'a']]})
+    
+    client = JMAPClient('https://example.com', 'fmu1-token', 'fmu1-token')
+    assert client.session.http2
+    client.session.session = httpx.Client(transport=httpx.MockTransport(handler))
+    client.session.api_url = 'https://example.com/api/'
+    
+    client.make_request([['Mailbox/get', {'accountId': 'u1'}, 'a']])
+    
+    assert seen[0]['methodCalls'][0][0] == 'Mailbox/get'
+    assert client.session.http_version == 'HTTP/1.1'
+
+
+def test_mailbox_tree_prefetch():
+    """Test prefetching envelopes for role mailboxes in one extra request"""
+    client = make_client([
+        {'methodResponses': [['Mailbox/get', {'state': 's1', 'list': [
+            {'id': 'mb1', 'name': 'Inbox', 'role': 'inbox'},
+            {'id': 'mb2', 'name': 'Sent', 'role': 'sent'},
+            {'id': 'mb3', 'name': 'Other'}
+        ]}, 'req1']]},
+        {'methodResponses': [
+            ['Email/query', {'ids': ['e1']}, 'pq0'],
+            ['Email/get', {'list': [{'id': 'e1', 'subject': 'Hi'}]}, 'pg0'],
+            ['Email/query', {'ids': []}, 'pq1'],
+            ['Email/get', {'list': []}, 'pg1']
+        ]}
+    ])
+    
+    tree = client.get_mailbox_tree(prefetch=True, prefetch_count=5)
+    
+    assert client.session.session.post.call_count == 2
+    method_calls = sent_body(client)['methodCalls']
+    assert [call[0] for call in method_calls] == ['Email/query', 'Email/get'] * 2
+    assert method_calls[0][1]['limit'] == 5
+    
+    assert tree.state == 's1'
+    assert tree.get_by_role('inbox').cached_envelopes == [{'id': 'e1', 'subject': 'Hi'}]
+    assert tree.get_by_role('sent').cached_envelopes == []
+    assert tree.get_by_id('mb3').cached_envelopes is None
+
+
+def test_mailbox_cache_revalidation():
+    """Test cached mailboxes are revalidated with Mailbox/changes"""
+    inbox = {'id': 'mb1', 'name': 'Inbox', 'role': 'inbox', 'totalEmails': 1}
+    other = {'id': 'mb2', 'name': 'Other'}
+    client = make_client([
+        {'methodResponses': [['Mailbox/get', {'state': 's1', 'list': [inbox, other]}, 'req1']]},
+        {'methodResponses': [
+            ['Mailbox/changes', {'oldState': 's1', 'newState': 's1', 'hasMoreChanges': False,
+                                 'created': [], 'updated': [], 'destroyed': []}, 'mc'],
+            ['Mailbox/get', {'state': 's1', 'list': []}, 'mcreated'],
+            ['Mailbox/get', {'state': 's1', 'list': []}, 'mupdated']
+        ]},
+        {'methodResponses': [
+            ['Mailbox/changes', {'oldState': 's1', 'newState': 's2', 'hasMoreChanges': False,
+                                 'created': [], 'updated': ['mb1'], 'destroyed': ['mb2']}, 'mc'],
+            ['Mailbox/get', {'state': 's2', 'list': []}, 'mcreated'],
+            ['Mailbox/get', {'state': 's2', 'list': [dict(inbox, totalEmails=2)]}, 'mupdated']
+        ]}
+    ], cache=StateCache())
+    
+    assert client.get_mailboxes() == [inbox, other]
+    
+    # Unchanged: cached list is returned
+    assert client.get_mailboxes() == [inbox, other]
+    assert sent_body(client)['methodCalls'][0][0] == 'Mailbox/changes'
+    
+    # Changed: updates and destroys are applied to the cached list
+    tree = client.get_mailbox_tree()
+    assert tree.state == 's2'
+    assert [mb.id for mb in tree.get_all_mailboxes()] == ['mb1']
+    assert tree.get_by_id('mb1').total_emails == 2
+
+
+def make_cached_session_client(first_error):
+    """Create a client on a cached session whose first POST raises first_error"""
+    client = make_client([{'methodResponses': []}], cache=StateCache())
+    client._session_from_cache = True
+    client.session.discover_session = MagicMock()
+    client.session.session.post.side_effect = [first_error] + list(client.session.session.post.side_effect)
+    return client
+
+
+def test_cached_session_not_resent_after_timeout():
+    """Test a request that may have run on the server is not sent twice"""
+    import requests
+    client = make_cached_session_client(requests.exceptions.ReadTimeout('timed out'))
+    
+    with pytest.raises(JMAPNetworkError):
+        client.send_email({'mailboxIds': {'mb1': True}}, identity_id='i1')
+    
+    assert client.session.session.post.call_count == 1
+    client.session.discover_session.assert_called_once()
+
+
+def test_cached_session_resent_after_connect_error():
+    """Test a request that never reached a stale API URL is resent once"""
+    import requests
+    import urllib3
+    refused = urllib3.exceptions.NewConnectionError(None, 'refused')
+    client = make_cached_session_client(requests.exceptions.ConnectionError(
+        urllib3.exceptions.MaxRetryError(None, '/api/', refused)
+    ))
+    
+    assert client.make_request([['Mailbox/get', {'accountId': 'u1'}, 'a']]) == {'methodResponses': []}
+    assert client.session.session.post.call_count == 2
+    client.session.discover_session.assert_called_once()
+
+
+def test_cached_session_scoped_by_credentials():
+    """Test a cached session is not reused after switching API keys"""
+    cache = StateCache()
+    old_key = JMAPClient('https://example.com', 'user', 'fmu1-old', http2=False, cache=cache)
+    cache.set(old_key._session_cache_scope, 'session', 's1', {'apiUrl': 'https://example.com/api/'})
+    
+    new_key = JMAPClient('https://example.com', 'user', 'fmu1-new', http2=False, cache=cache)
+    new_key.session.discover_session = MagicMock()
+    new_key.connect()
+    
+    new_key.session.discover_session.assert_called_once()
+    assert 'fmu1' not in new_key._session_cache_scope
+
+
+def test_method_error_checks_session_state():
+    """Test a method error from an outdated session still triggers rediscovery"""
+    client = make_client([{
+        'methodResponses': [['error', {'type': 'accountNotFound'}, 'req1']],
+        'sessionState': 's2'
+    }])
+    client.session.state = 's1'
+    client.session.discover_session = MagicMock()
+    
+    with pytest.raises(JMAPMethodError) as excinfo:
+        client.get_mailboxes()
+    
+    assert excinfo.value.error_type == 'accountNotFound'
+    client.session.discover_session.assert_called_once()
+
+
+def make_httpx_client(handler):
+    """Create a client using an httpx transport served by handler"""
+    httpx = pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    
+    client = JMAPClient('https://example.com', 'user', 'pass')
+    client.session.session = httpx.Client(transport=httpx.MockTransport(handler))
+    client.session.api_url = 'https://example.com/api/'
+    client.session.primary_accounts = {'urn:ietf:params:jmap:mail': 'u1'}
+    return client
+
+
+@pytest.mark.parametrize('min_size', [0, 1024 * 1024])
+def test_get_emails_stream(min_size):
+    """Test streamed Email/get yields emails from both parse paths"""
+    pytest.importorskip('ijson')
+    httpx = pytest.importorskip('httpx')
+    
+    def handler(request):
+        emails = [{'id': f'e{i}', 'keywords': {}, 'from': [{'email': 'a@example.com'}]} for i in range(3)]
+        return httpx.Response(200, json={
+            'methodResponses': [['Email/get', {'accountId': 'u1', 'list': emails, 'notFound': []}, 'req1']],
+            'sessionState': 'x'
+        })
+    
+    client = make_httpx_client(handler)
+    client._STREAM_MIN_SIZE = min_size
+    
+    emails = client.get_emails(['e0', 'e1', 'e2'], stream=True)
+    assert [email['id'] for email in emails] == ['e0', 'e1', 'e2']
+
+
+def test_get_emails_stream_error():
+    """Test method errors are raised from streamed responses"""
+    pytest.importorskip('ijson')
+    httpx = pytest.importorskip('httpx')
+    
+    def handler(request):
+        return httpx.Response(200, json={
+            'methodResponses': [['error', {'type': 'accountNotFound', 'description': 'No account'}, 'req1']]
+        })
+    
+    client = make_httpx_client(handler)
+    client._STREAM_MIN_SIZE = 0
+    
+    with pytest.raises(JMAPMethodError) as exc_info:
+        list(client.get_emails(['e1'], stream=True))
+    assert exc_info.value.error_type == 'accountNotFound'
+
+
+def test_simdjson_extracts_call_result(monkeypatch):
+    """Test large responses are decoded on demand with simdjson"""
+    pytest.importorskip('simdjson')
+    monkeypatch.setattr(client_module, '_USE_SIMDJSON', True)
+    monkeypatch.setattr(JMAPClient, '_SIMD_THRESHOLD', 0)
+    
+    client = make_client([
+        {'methodResponses': [['Email/get', {'list': [{'id': 'e1'}]}, 'req1']]},
+        {'methodResponses': [['error', {'type': 'invalidArguments'}, 'req2']]},
+        b'[]',
+        {'methodResponses': [['Email/get', {'list': [{'id': 'e4'}]}, 'req4']]}
+    ])
+    assert client._json_parser is not None
+    
+    assert client.get_emails(['e1']) == [{'id': 'e1'}]
+    with pytest.raises(JMAPMethodError):
+        client.get_emails(['e2'])
+    with pytest.raises(JMAPServerError):
+        client.get_emails(['e3'])
+    
+    # The shared parser is still usable after errors
+    assert client.get_emails(['e4']) == [{'id': 'e4'}]
+
+
+def test_simdjson_skipped_for_small_responses(monkeypatch):
+    """Test responses under _SIMD_THRESHOLD use the regular JSON backend"""
+    pytest.importorskip('simdjson')
+    monkeypatch.setattr(client_module, '_USE_SIMDJSON', True)
+    
+    client = make_client([{'methodResponses': [['Email/get', {'list': [{'id': 'e1'}]}, 'req1']]}])
+    client._json_parser = MagicMock()
+    
+    assert client.get_emails(['e1']) == [{'id': 'e1'}]
+    client._json_parser.parse.assert_not_called()
+
+
+def test_send_email_results_by_call_id():
+    """Test send_email reads the Email/set and EmailSubmission/set results by callId"""
+    email = {'from': [], 'mailboxIds': {'sent': True}, 'subject': 'Hi'}
+    client = make_client([{
+        'methodResponses': [
+            ['Email/set', {'created': {'draft': {'id': 'e1'}}}, 'c1'],
+            ['EmailSubmission/set', {'created': {'submission': {'id': 's1'}}}, 'c2'],
+            ['Email/set', {'updated': {'e1': None}}, 'c2']
+        ]
+    }])
+    
+    assert client.send_email(dict(email)) == {'id': 's1'}
+    
+    client = make_client([{
+        'methodResponses': [
+            ['Email/set', {'notCreated': {'draft': {'type': 'invalidProperties'}}}, 'c1'],
+            ['EmailSubmission/set', {'notCreated': {'submission': {'type': 'notFound'}}}, 'c2']
+        ]
+    }])
+    
+    with pytest.raises(JMAPMethodError) as exc_info:
+        client.send_email(dict(email))
+    assert exc_info.value.error_type == 'invalidProperties'
+
+
+def test_iter_emails_pages_by_anchor():
+    """Test iter_emails requests pages anchored on the last ID until a short page"""
+    def page(ids):
+        return {'methodResponses': [
+            ['Email/query', {'ids': ids}, 'q1'],
+            ['Email/get', {'list': [{'id': i} for i in ids]}, 'g1']
+        ]}
+    
+    client = make_client([page(['e1', 'e2']), page(['e3', 'e4']), page(['e5'])])
+    
+    emails = client.iter_emails({'inMailbox': 'm1'}, page_size=2)
+    assert [email['id'] for email in emails] == ['e1', 'e2', 'e3', 'e4', 'e5']
+    
+    queries = [sent_body(client, i)['methodCalls'][0][1] for i in range(3)]
+    assert 'anchor' not in queries[0]
+    assert queries[1]['anchor'] == 'e2' and queries[1]['anchorOffset'] == 1
+    assert queries[2]['anchor'] == 'e4'
+    assert all(query['limit'] == 2 for query in queries)
+
+
+def test_iterator_reader():
+    """Test the chunk reader behind streamed httpx responses"""
+    from jmap_engine.session import _IteratorReader
+    
+    reader = _IteratorReader(iter([b'ab', b'cde', b'', b'fgh']))
+    assert reader.read(1) == b'a'
+    assert reader.read(3) == b'bcd'
+    assert reader.read() == b'efgh'
+    assert reader.read(5) == b''
+
+
+def bootstrap_responses(with_mailboxes):
+    """Responses for bootstrap(): optional Mailbox/get plus the chained email calls"""
+    responses = [
+        ['Email/query', {'ids': ['e1']}, 'q1'],
+        ['Email/get', {'list': [{'id': 'e1'}]}, 'g1']
+    ]
+    if with_mailboxes:
+        responses.insert(0, ['Mailbox/get', {
+            'list': [{'id': 'inbox', 'name': 'Inbox', 'role': 'inbox'}], 'state': 's1'
+        }, 'm1'])
+    return {'methodResponses': responses}
+
+
+def test_bootstrap_single_request_with_cached_inbox():
+    """Test bootstrap sends mailboxes and emails together when the inbox ID is cached"""
+    cache = StateCache()
+    client = make_client([bootstrap_responses(True)], cache=cache)
+    scope = client._account_cache_scope('u1')
+    cache.set(scope, 'Mailbox/get', 's0', [{'id': 'inbox', 'name': 'Inbox', 'role': 'inbox'}])
+    
+    tree, email_ids, emails = client.bootstrap()
+    
+    assert client.session.session.post.call_count == 1
+    assert tree.get_by_role('inbox').id == 'inbox'
+    assert email_ids == ['e1']
+    assert emails == [{'id': 'e1'}]
+    assert cache.get(scope, 'Mailbox/get')[0] == 's1'
+
+
+def test_mailbox_cache_scoped_by_server_and_user():
+    """Test accounts with the same ID for another server or user don't share entries"""
+    cache = StateCache()
+    for base_url, username in [('https://example.com', 'other'), ('https://other.example.com', 'user')]:
+        other = JMAPClient(base_url, username, 'pass', http2=False, cache=cache)
+        cache.set(other._account_cache_scope('u1'), 'Mailbox/get', 's0', [{'id': 'stale'}])
+    
+    client = make_client([
+        {'methodResponses': [['Mailbox/get', {'state': 's1', 'list': [{'id': 'mb1'}]}, 'req1']]}
+    ], cache=cache)
+    
+    assert client.get_mailboxes() == [{'id': 'mb1'}]
+    assert sent_body(client)['methodCalls'][0][0] == 'Mailbox/get'
+
+
+def test_bootstrap_without_cache():
+    """Test bootstrap falls back to fetching mailboxes first"""
+    client = make_client([
+        {'methodResponses': [['Mailbox/get', {
+            'list': [{'id': 'inbox', 'name': 'Inbox', 'role': 'inbox'}], 'state': 's1'
+        }, 'req1']]},
+        bootstrap_responses(False)
+    ])
+    
+    tree, email_ids, emails = client.bootstrap(limit=5)
+    
+    assert client.session.session.post.call_count == 2
+    assert sent_body(client)['methodCalls'][0][1]['filter'] == {'inMailbox': 'inbox'}
+    assert email_ids == ['e1']
+
+
+def test_account_id_cached_until_session_reload():
+    """Test the primary account ID is resolved once per session object"""
+    client = JMAPClient('https://example.com', 'user', 'pass', http2=False)
+    client.session._load_session_data({
+        'apiUrl': 'https://example.com/api/',
+        'accounts': {'a1': {}, 'a2': {}},
+        'primaryAccounts': {}
+    })
+    
+    assert client.session.get_account_id() == 'a1'
+    client.session.accounts = {}
+    assert client.session.get_account_id() == 'a1'
+    
+    client.session._load_session_data({
+        'apiUrl': 'https://example.com/api/',
+        'primaryAccounts': {'urn:ietf:params:jmap:mail': 'u2'}
+    })
+    assert client.session.get_account_id() == 'u2'
+
+
+def test_pipeline_single_request():
+    """Test pipelined calls go out in one request and resolve by callId"""
+    client = make_client([{
+        'methodResponses': [
+            ['Mailbox/get', {'list': [{'id': 'mb1', 'role': 'inbox'}]}, 'req1'],
+            ['Email/query', {'ids': ['e1']}, 'req2'],
+            ['Email/get', {'list': [{'id': 'e1', 'subject': 'Hi'}]}, 'req3']
+        ]
+    }])
+    
+    with client.pipeline() as p:
+        mailboxes = p.get_mailboxes()
+        ids = p.query_emails(filter={'inMailbox': 'mb1'}, limit=5)
+        emails = p.get_emails(ids, properties=['subject'])
+        
+        assert not emails.done()
+        with pytest.raises(JMAPInvalidRequestError):
+            emails.result()
+    
+    assert client.session.session.post.call_count == 1
+    assert mailboxes.result().by_role['inbox']['id'] == 'mb1'
+    assert ids.result() == ['e1']
+    assert emails.result() == [{'id': 'e1', 'subject': 'Hi'}]
+    
+    calls = sent_body(client)['methodCalls']
+    assert [call[0] for call in calls] == ['Mailbox/get', 'Email/query', 'Email/get']
+    assert calls[2][1]['#ids'] == {'resultOf': 'req2', 'name': 'Email/query', 'path': '/ids'}
+
+
+def test_pipeline_execute_returns_results_in_order():
+    """Test execute() returns values in queue order and merges capabilities"""
+    client = make_client([{
+        'methodResponses': [
+            ['Identity/get', {'list': [{'id': 'i1'}]}, 'req1'],
+            ['Email/get', {'list': []}, 'req2']
+        ]
+    }])
+    
+    p = client.pipeline()
+    p.get_identities()
+    p.get_emails(['e1'])
+    
+    assert len(p) == 2
+    assert p.execute() == [[{'id': 'i1'}], []]
+    assert len(p) == 0
+    assert p.execute() == []
+    assert 'urn:ietf:params:jmap:submission' in sent_body(client)['using']
+
+
+def test_pipeline_get_emails_requires_query_result():
+    """Test only Email/query results can feed get_emails() by reference"""
+    client = make_client([])
+    p = client.pipeline()
+    
+    with pytest.raises(JMAPInvalidRequestError):
+        p.get_emails(p.get_mailboxes())
@@ -3,8 +3,8 @@ Tests for Email models
 """
 
 import pytest
-from datetime import datetime
-from jmap_engine.email import Email, EmailAddress, EmailBodyPart, EmailQuery
+from datetime import datetime, timezone
+from jmap_engine.email import Email, EmailAddress, EmailBodyPart, EmailQuery, to_jmap_filter
 
 
 def test_email_address():
@@ -149,3 +149,66 @@ def test_email_query_with_dates():
     data = query.to_dict()
     assert 'after' in data
     assert 'before' in data
+
+
+def test_to_jmap_filter():
+    """Test filter conversion to JMAP FilterOperator/FilterCondition"""
+    after = datetime(2025, 1, 31, 12, 0, tzinfo=timezone.utc)
+    
+    # Conditions: datetimes become UTCDates
+    assert to_jmap_filter({'inMailbox': 'mb1', 'notKeyword': '$seen', 'after': after}) == {
+        'inMailbox': 'mb1',
+        'notKeyword': '$seen',
+        'after': '2025-01-31T12:00:00Z'
+    }
+    
+    # Lists are combined with AND; operators nest
+    data = to_jmap_filter([
+        {'inMailbox': 'mb1'},
+        {'operator': 'or', 'conditions': [EmailQuery(has_keyword='$flagged'), {'notKeyword': '$seen'}]}
+    ])
+    assert data == {
+        'operator': 'AND',
+        'conditions': [
+            {'inMailbox': 'mb1'},
+            {'operator': 'OR', 'conditions': [{'hasKeyword': '$flagged'}, {'notKeyword': '$seen'}]}
+        ]
+    }
+    
+    assert to_jmap_filter(None) is None
+    with pytest.raises(ValueError):
+        to_jmap_filter({'operator': 'XOR', 'conditions': []})
+
+
+def test_email_keyword_flags():
+    """Test unread/flagged flags are derived from keywords"""
+    email = Email.from_dict({'id': 'e1', 'keywords': {'$flagged': True}})
+    assert email.is_unread()
+    assert email.is_flagged()
+    
+    email.keywords = {'$seen': True}
+    email.refresh_flags()
+    assert not email.is_unread()
+    assert not email.is_flagged()
+    
+    assert Email().is_unread()
+
+
+def test_email_from_dict_nulls():
+    """Test JMAP null values are parsed as empty"""
+    email = Email.from_dict({
+        'id': 'e1',
+        'from': [{'email': 'a@example.com', 'name': None}],
+        'to': None,
+        'subject': None,
+        'receivedAt': '2025-01-31T12:00:00Z',
+        'sentAt': None,
+        'textBody': None
+    })
+    
+    assert email.from_[0].email == 'a@example.com'
+    assert email.to == []
+    assert email.subject == ''
+    assert email.received_at == datetime(2025, 1, 31, 12, 0, tzinfo=timezone.utc)
+    assert email.sent_at is None
+    assert email.text_body == []
@@ -0,0 +1,42 @@
+"""
+Tests for the JSON backend selection
+"""
+
+import importlib.util
+import sys
+import pytest
+import jmap_engine._json
+
+
+def load_backend(monkeypatch, *missing):
+    """Load a fresh copy of jmap_engine._json with the given packages hidden"""
+    for name in missing:
+        monkeypatch.setitem(sys.modules, name, None)
+    
+    spec = importlib.util.spec_from_file_location('_json_copy', jmap_engine._json.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('missing,backend', [
+    ((), None),
+    (('orjson',), 'msgspec'),
+    (('orjson', 'msgspec'), 'json'),
+])
+def test_backend_round_trip(monkeypatch, missing, backend):
+    """Test every backend encodes to compact UTF-8 bytes and rejects bad input"""
+    if backend == 'msgspec':
+        pytest.importorskip('msgspec')
+    
+    module = load_backend(monkeypatch, *missing)
+    if backend is not None:
+        assert module.BACKEND == backend
+    
+    data = module.dumps({'using': ('a', 'b'), 'subject': 'Grüße'})
+    assert data == '{"using":["a","b"],"subject":"Grüße"}'.encode('utf-8')
+    assert module.loads(data) == {'using': ['a', 'b'], 'subject': 'Grüße'}
+    
+    with pytest.raises(ValueError):
+        module.loads(b'not json')
+    assert issubclass(module.JSONDecodeError, ValueError)
@@ -3,7 +3,7 @@ Tests for Mailbox and MailboxTree
 """
 
 import pytest
-from jmap_engine.mailbox import Mailbox, MailboxTree
+from jmap_engine.mailbox import Mailbox, MailboxList, MailboxTree
 
 
 def test_mailbox_from_dict():
@@ -186,6 +186,63 @@ def test_mailbox_tree_find_by_path():
     assert not_found is None
 
 
+def test_mailbox_tree_lookup_duplicates():
+    """Test lookups with repeated names and custom separators"""
+    mailboxes = [
+        {'id': 'a', 'name': 'Archive', 'sortOrder': 2},
+        {'id': 'w', 'name': 'Work', 'sortOrder': 1},
+        {'id': 'wa', 'name': 'Archive', 'parentId': 'w'}
+    ]
+    
+    tree = MailboxTree(mailboxes)
+    
+    # First mailbox with the name wins
+    assert tree.get_by_name('Archive').id == 'a'
+    assert tree.find_by_path('Work/Archive').id == 'wa'
+    assert tree.find_by_path('Work.Archive', separator='.').id == 'wa'
+    assert tree.find_by_path('Archive/Work') is None
+    assert tree.get_by_role('inbox') is None
+
+
+def test_mailbox_tree_find_by_prefix():
+    """Test case-insensitive prefix search over mailbox names"""
+    mailboxes = [
+        {'id': 'a', 'name': 'Archive'},
+        {'id': 'w', 'name': 'Work'},
+        {'id': 'wa', 'name': 'archive 2024', 'parentId': 'w'},
+        {'id': 'i', 'name': 'Inbox'}
+    ]
+    
+    tree = MailboxTree(mailboxes)
+    
+    assert [m.id for m in tree.find_by_prefix('ARCH')] == ['a', 'wa']
+    assert [m.id for m in tree.find_by_prefix('in')] == ['i']
+    assert tree.find_by_prefix('zzz') == []
+    assert len(tree.find_by_prefix('')) == 4
+
+
+def test_mailbox_tree_recursive_counts():
+    """Test precomputed subtree counts and incremental updates"""
+    mailboxes = [
+        {'id': 'r', 'name': 'Root', 'totalEmails': 10, 'unreadEmails': 1},
+        {'id': 'c', 'name': 'Child', 'parentId': 'r', 'totalEmails': 5, 'unreadEmails': 2},
+        {'id': 'g', 'name': 'Grandchild', 'parentId': 'c', 'totalEmails': 3, 'unreadEmails': 3},
+        {'id': 'o', 'name': 'Other', 'totalEmails': 7}
+    ]
+    
+    tree = MailboxTree(mailboxes)
+    root = tree.get_by_id('r')
+    assert root._total_recursive == 18
+    assert root.get_total_emails_recursive() == 18
+    assert root.get_unread_emails_recursive() == 6
+    
+    tree.update_counts([{'id': 'g', 'totalEmails': 4, 'unreadEmails': 0}])
+    assert root.get_total_emails_recursive() == 19
+    assert root.get_unread_emails_recursive() == 3
+    assert tree.get_by_id('c').get_total_emails_recursive() == 9
+    assert tree.get_by_id('o').get_total_emails_recursive() == 7
+
+
 def test_mailbox_tree_statistics():
     """Test statistics generation"""
     mailboxes = [
@@ -202,6 +259,45 @@ def test_mailbox_tree_statistics():
     assert stats['total_emails'] == 350  # 100 + 200 + 50
     assert stats['unread_emails'] == 15  # 10 + 0 + 5
     assert stats['deepest_level'] == 1  # Sub is at level 1
+    
+    # Count updates are reflected
+    tree.update_counts([{'id': '3', 'totalEmails': 60, 'unreadEmails': 0}])
+    stats = tree.get_statistics()
+    assert stats['total_emails'] == 360
+    assert stats['unread_emails'] == 10
+    
+    # Empty tree
+    assert MailboxTree([]).get_statistics()['deepest_level'] == 0
+
+
+def test_mailbox_tree_envelope_cache():
+    """Test prefetched envelopes are stored until invalidated"""
+    tree = MailboxTree([{'id': '1', 'name': 'Inbox', 'role': 'inbox'}], state='s1')
+    assert tree.get_cached_envelopes('1') is None
+    
+    tree.set_cached_envelopes('1', [{'id': 'e1'}])
+    assert tree.get_by_id('1').cached_envelopes == [{'id': 'e1'}]
+    assert tree.get_cached_envelopes('1') == [{'id': 'e1'}]
+    
+    tree.invalidate_envelopes()
+    assert tree.get_cached_envelopes('1') is None
+    assert tree.get_by_id('1').cached_envelopes is None
+    assert tree.get_cached_envelopes('missing') is None
+
+
+def test_mailbox_list_by_role():
+    """Test role index on mailbox lists"""
+    mailboxes = MailboxList([
+        {'id': '1', 'name': 'Inbox', 'role': 'inbox'},
+        {'id': '2', 'name': 'Custom'},
+        {'id': '3', 'name': 'Sent', 'role': 'sent'}
+    ])
+    
+    assert isinstance(mailboxes, list)
+    assert len(mailboxes) == 3
+    assert mailboxes.by_role['inbox']['id'] == '1'
+    assert mailboxes.by_role.get('sent')['id'] == '3'
+    assert mailboxes.by_role.get('trash') is None
 
 
 def test_mailbox_permissions():